@@ -3,35 +3,41 @@ import time
 
 from core.VRPWDData import VRPWDData
 from core.VRPWDSolution import VRPWDSolution
-from algorithms.tsp.TSPMIPModel import create_solution
+from algorithms.tsp.TSPLocalSearch import TSPLocalSearch
+from algorithms.tsp.utils import create_solution, warm_start_tour
+from core.Tracer import traced
 
 
 class TSPGreedy:
     """An implementation of the Greedy heuristic for the TSP."""
 
-    def __init__(self, instance: VRPWDData):
+    def __init__(
+        self,
+        instance: VRPWDData,
+        warm_start: VRPWDSolution = None,
+        time_limit: float = 1,
+    ):
         self.instance = instance
         self.__algorithm = "Nearest_Neighbor_Greedy"
+        self.warm_start = warm_start
+        self.time_limit = time_limit
 
-    def solve(self) -> VRPWDSolution:
-        """Solve the TSP using the Greedy heuristic."""
+    def _nearest_neighbor_tour(self) -> list:
+        """Return the tour (indices of dpd_nodes) built by the nearest neighbor rule"""
 
-        start = time.time()
-        # Initialize the solution
         tour = [0]
-        unvisited = np.array(range(1, self.instance.dpd_time_matrix.shape[0]))
+        times = self.instance.dpd_time_matrix
+        visited = np.zeros(times.shape[0], dtype=bool)
+        visited[0] = True
 
         # While there are unvisited cities
-        while unvisited.size != 0:
+        for _ in range(times.shape[0] - 1):
             # Find the closest unvisited city
-            last_city = tour[-1]
-            closest_city = unvisited[
-                np.argmin(self.instance.dpd_time_matrix[last_city, unvisited])
-            ]
+            closest_city = int(np.argmin(np.where(visited, np.inf, times[tour[-1]])))
 
             # Add it to the solution
             tour.append(closest_city)
-            unvisited = np.delete(unvisited, np.where(unvisited == closest_city))
+            visited[closest_city] = True
 
         # Add the return to the deposit
         tour.append(0)
@@ -39,6 +45,24 @@ class TSPGreedy:
         # if the deposit is in the demands nodes, delete the first node of the tour
         if self.instance.deposit in self.instance.dpd_nodes[1:]:
             tour = tour[1:]
+        return tour
+
+    @traced("tsp_solve")
+    def solve(self) -> VRPWDSolution:
+        """Solve the TSP using the Greedy heuristic, improved by a local search
+        of at most time_limit seconds."""
+
+        start = time.time()
+        if self.warm_start is not None:
+            # repair the tour of the previous solution instead of building a new one
+            tour = warm_start_tour(self.instance, self.warm_start.truck_stops())
+        else:
+            tour = self._nearest_neighbor_tour()
+        # improvement phase, 2-opt and Or-opt moves
+        local_search = TSPLocalSearch(
+            self.instance.dpd_time_matrix, time_limit=self.time_limit
+        )
+        tour = local_search.improve(tour)
 
         solution = create_solution(self.instance, tour)
         objective_value = sum(
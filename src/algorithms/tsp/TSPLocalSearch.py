@@ -0,0 +1,141 @@
+import numpy as np
+import time
+
+from collections import deque
+from core.Tracer import traced
+
+
+class TSPLocalSearch:
+    """An implementation of the 2-opt and Or-opt local search for the TSP, on the
+    time matrix of the dpd nodes. The moves are only searched around the k nearest
+    neighbors of the active nodes (don't-look bits) and evaluated in O(1), the
+    travel times of the reversed segments being given by prefix sums since the
+    matrix may be asymmetric (one-way roads)."""
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        neighbors: int = 8,
+        time_limit: float = 1,
+        neighbor_lists: list = None,
+    ):
+        start = time.perf_counter()
+        self.matrix = matrix
+        self.time_limit = time_limit
+        if neighbor_lists is None:
+            neighbor_lists = nearest_neighbors(matrix, neighbors)
+        self.neighbors = neighbor_lists
+        # the setup is part of the budget of the first improvement
+        self.setup_time = time.perf_counter() - start
+
+    @traced("local_search")
+    def improve(self, tour: list) -> list:
+        """Return the tour (list of nodes with fixed first and last nodes) improved by
+        2-opt and Or-opt moves until a local optimum or the time limit"""
+
+        self.tour = list(tour)
+        if len(self.tour) < 4:
+            return self.tour
+        deadline = time.perf_counter() + self.time_limit - self.setup_time
+        self.setup_time = 0
+        self._index()
+        # don't-look bits: only the nodes around the last changes are searched
+        active = deque(self.tour[1:-1])
+        is_active = set(active)
+        while active and time.perf_counter() < deadline:
+            node = active.popleft()
+            is_active.discard(node)
+            changed = self._two_opt(node) or self._or_opt(node)
+            if changed:
+                self._index()
+                for node in changed:
+                    if node not in is_active:
+                        active.append(node)
+                        is_active.add(node)
+        return self.tour
+
+    def _index(self):
+        """Update the positions of the nodes and the prefix sums of the tour travel
+        times, forward and backward"""
+
+        tour = np.array(self.tour)
+        self.pos = {node: i for i, node in enumerate(self.tour)}
+        self.forward = np.cumsum(self.matrix[tour[:-1], tour[1:]]).tolist()
+        self.backward = np.cumsum(self.matrix[tour[1:], tour[:-1]]).tolist()
+        self.forward.insert(0, 0.0)
+        self.backward.insert(0, 0.0)
+
+    def _two_opt(self, node: int) -> tuple:
+        """Apply the first improving reversal of a segment creating an edge between
+        the node and one of its neighbors, return the nodes of the changed edges"""
+
+        m, tour, pos = self.matrix.item, self.tour, self.pos
+        last = len(tour) - 1
+        for neighbor in self.neighbors[node]:
+            if neighbor not in pos:
+                continue
+            # reversal of tour[i + 1 : j + 1]: edges (t_i, t_j) and (t_i+1, t_j+1)
+            i, j = sorted((pos[node], pos[neighbor]))
+            for i, j in ((i, j), (i - 1, j - 1)):
+                if i < 0 or j >= last or j - i < 2:
+                    continue
+                a, b, c, d = tour[i], tour[i + 1], tour[j], tour[j + 1]
+                delta = (
+                    m(a, c)
+                    + m(b, d)
+                    - m(a, b)
+                    - m(c, d)
+                    + (self.backward[j] - self.backward[i + 1])
+                    - (self.forward[j] - self.forward[i + 1])
+                )
+                if delta < -1e-9:
+                    tour[i + 1 : j + 1] = tour[j:i:-1]
+                    return a, b, c, d
+        return ()
+
+    def _or_opt(self, node: int) -> tuple:
+        """Apply the first improving move of a segment of 1 to 3 nodes starting with
+        the node next to one of its neighbors, return the nodes of the changed edges"""
+
+        m, tour, pos = self.matrix.item, self.tour, self.pos
+        last = len(tour) - 1
+        s = pos[node]
+        for length in (1, 2, 3):
+            e = s + length - 1
+            if s < 1 or e >= last:
+                break
+            prev, first, end, next_ = tour[s - 1], tour[s], tour[e], tour[e + 1]
+            removal = m(prev, next_) - m(prev, first) - m(end, next_)
+            for neighbor in self.neighbors[node]:
+                if neighbor not in pos:
+                    continue
+                # segment inserted between the neighbor and its successor
+                p = pos[neighbor]
+                if s - 1 <= p <= e or p >= last:
+                    continue
+                c, d = tour[p], tour[p + 1]
+                delta = removal + m(c, first) + m(end, d) - m(c, d)
+                if delta < -1e-9:
+                    segment = tour[s : e + 1]
+                    if p < s:
+                        tour[p + 1 : e + 1] = segment + tour[p + 1 : s]
+                    else:
+                        tour[s : p + 1] = tour[e + 1 : p + 1] + segment
+                    return prev, first, end, next_, c, d
+        return ()
+
+
+def nearest_neighbors(matrix: np.ndarray, k: int) -> list:
+    """Return the k nearest nodes of each node by round trip time, itself excluded,
+    sorted by increasing time"""
+
+    k = min(k, len(matrix) - 1)
+    if k <= 0:
+        return [[] for _ in range(len(matrix))]
+    round_trip = matrix + matrix.T
+    np.fill_diagonal(round_trip, np.inf)
+    nearest = np.argpartition(round_trip, k - 1, axis=1)[:, :k]
+    # sorted by time, then by node on a tie
+    times = np.take_along_axis(round_trip, nearest, axis=1)
+    order = np.lexsort((nearest, times), axis=1)
+    return np.take_along_axis(nearest, order, axis=1).tolist()
@@ -1,37 +1,26 @@
 import gurobipy as gp
 import networkx as nx
+import numpy as np
 
 from gurobipy import GRB
 from itertools import combinations
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 from core.VRPWDData import VRPWDData
 from core.VRPWDSolution import VRPWDSolution
 from core.utils import available_cpu_count
+from core.MIPProgress import MIPProgress
+from algorithms.tsp.utils import create_solution, warm_start_tour
+from core.Tracer import record_size, traced
 
-
-def create_solution(instance: VRPWDData, tour: list) -> dict:
-    truck_solution = [instance.dpd_nodes[j] for j in tour]
-    solution = {"truck": [], "drone_1": [], "drone_2": []}
-    # create a dictionnary with the demand of each node
-    node_demands = {
-        node: instance.graph.nodes[node]["demand"] for node in instance.dpd_nodes
-    }
-    for i, x in enumerate(truck_solution[:-1]):
-        if x in node_demands.keys() and node_demands[x] > 0.0:
-            solution["truck"].append((x, x, 60, node_demands[x]))
-        y = truck_solution[i + 1]
-        sp = nx.shortest_path(
-            instance.graph, x, y, weight="travel_time", method="dijkstra"
-        )
-        # create final solution
-        for j, a in enumerate(sp[:-1]):
-            b = sp[j + 1]
-            time = instance.graph.edges[a, b]["travel_time"]
-            solution["truck"].append((a, b, time))
-    return solution
+# value over which an edge of a fractional solution is in its support graph
+FRACTIONAL_TOLERANCE = 1e-6
+# minimum violation of a subtour cut to be added
+CUT_TOLERANCE = 1e-3
 
 
 class TSPMIPModel:
-    def __init__(self, instance: VRPWDData):
+    def __init__(self, instance: VRPWDData, warm_start: VRPWDSolution = None):
         self.instance = instance
         self.__algorithm = "MIP"
         self.model = gp.Model("TSP")
@@ -51,18 +40,77 @@ class TSPMIPModel:
         )
 
         # Symmetric direction: Copy the object
-        for i, j in self.x.keys():
+        for i, j in list(self.x.keys()):
             self.x[j, i] = self.x[i, j]  # edge in opposite direction
 
+        # position of each node in self.nodes
+        self.__position = {node: k for k, node in enumerate(self.nodes)}
+
         # Constraints: two edges incident to each city
         self.model.addConstrs(self.x.sum(c, "*") == 2 for c in self.nodes)
+        self.progress = MIPProgress()
+        if warm_start is not None:
+            self._set_warm_start(warm_start)
+
+    def _set_warm_start(self, warm_start: VRPWDSolution):
+        """Start the search from the (repaired) tour of a previous solution"""
+
+        tour = warm_start_tour(self.instance, warm_start.truck_stops())
+        for var in self.x.values():
+            var.Start = 0
+        for i, j in zip(tour[:-1], tour[1:]):
+            self.x[i, j].Start = 1
+
+    def _components(self, vals, tolerance: float) -> list:
+        """Return the connected components (lists of nodes) of the graph of the edges
+        whose value is over the tolerance"""
+
+        edges = [(i, j) for i, j in self.time.keys() if vals[i, j] > tolerance]
+        rows = [self.__position[i] for i, _ in edges]
+        cols = [self.__position[j] for _, j in edges]
+        graph = csr_matrix(
+            (np.ones(len(edges)), (rows, cols)), shape=(len(self.nodes),) * 2
+        )
+        count, labels = connected_components(graph, directed=False)
+        components = [[] for _ in range(count)]
+        for node, label in zip(self.nodes, labels.tolist()):
+            components[label].append(node)
+        return components
 
+    def _min_cut(self, vals) -> list:
+        """Return the side of the deposit of a global min cut of the support graph
+        weighted by the values of the edges if the cut is below 2, else None"""
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        graph.add_weighted_edges_from(
+            (i, j, vals[i, j])
+            for i, j in self.time.keys()
+            if vals[i, j] > FRACTIONAL_TOLERANCE
+        )
+        value, (side, other_side) = nx.stoer_wagner(graph)
+        if value >= 2 - CUT_TOLERANCE:
+            return None
+        return side if self.nodes[0] in side else other_side
+
+    def _cut_set(self, component: list):
+        """Return the sum of the edges between the component and the other nodes, of
+        |S| x |V \\ S| terms"""
+
+        inside = set(component)
+        outside = [j for j in self.nodes if j not in inside]
+        return gp.quicksum(self.x[i, j] for i in component for j in outside)
+
+    @traced("tsp_solve")
     def solve(
         self,
         time_limit: int = 3600,
         max_gap: float = 0.00001,
         nb_threads: int = available_cpu_count(),
+        warm_start: VRPWDSolution = None,
     ) -> VRPWDSolution:
+        if warm_start is not None:
+            self._set_warm_start(warm_start)
         self.model.Params.OutputFlag = int(self.instance._VERBOSE)
         self.model.Params.TimeLimit = time_limit
         self.model.Params.MIPGap = max_gap
@@ -70,47 +118,59 @@ class TSPMIPModel:
 
         def _subtourelim(model, where):
             if where == GRB.Callback.MIPSOL:
-                # make a list of edges selected in the solution
+                # every subtour of the integer solution is cut off
                 vals = model.cbGetSolution(model._vars)
-                selected = gp.tuplelist(
-                    (i, j) for i, j in model._vars.keys() if vals[i, j] > 0.5
-                )
-                # find the shortest cycle in the selected edge list
-                tour = _subtour(selected)
-                if len(tour) < len(self.nodes):
-                    # add subtour elimination constr. for every pair of cities in subtour
-                    model.cbLazy(
-                        gp.quicksum(model._vars[i, j] for i, j in combinations(tour, 2))
-                        <= len(tour) - 1
-                    )
-
-        # Given a tuplelist of edges, find the shortest subtour
-        def _subtour(edges):
-            unvisited = self.nodes[:]
-            cycle = self.nodes[:]  # Dummy - guaranteed to be replaced
-            while unvisited:  # true if list is non-empty
-                thiscycle = []
-                neighbors = unvisited
-                while neighbors:
-                    current = neighbors[0]
-                    thiscycle.append(current)
-                    unvisited.remove(current)
-                    neighbors = [
-                        j for _, j in edges.select(current, "*") if j in unvisited
-                    ]
-                if len(thiscycle) <= len(cycle):
-                    cycle = thiscycle  # New shortest subtour
-            return cycle
+                components = self._components(vals, 0.5)
+                if len(components) > 1:
+                    for component in components:
+                        model.cbLazy(self._cut_set(component) >= 2)
+            elif (
+                where == GRB.Callback.MIPNODE
+                and model.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL
+            ):
+                # subtour cuts violated by the fractional solution of the node
+                vals = model.cbGetNodeRel(model._vars)
+                components = self._components(vals, FRACTIONAL_TOLERANCE)
+                if len(components) > 1:
+                    for component in components:
+                        model.cbCut(self._cut_set(component) >= 2)
+                elif model.cbGet(GRB.Callback.MIPNODE_NODCNT) == 0:
+                    # at the root, global min cut of the support graph
+                    component = self._min_cut(vals)
+                    if component is not None:
+                        model.cbCut(self._cut_set(component) >= 2)
+
+        def _tour(edges):
+            # walk the cycle of the selected edges from the deposit
+            neighbors = {i: [] for i in self.nodes}
+            for i, j in edges:
+                neighbors[i].append(j)
+            tour, visited = [self.nodes[0]], {self.nodes[0]}
+            while True:
+                unvisited = [j for j in neighbors[tour[-1]] if j not in visited]
+                if not unvisited:
+                    return tour
+                tour.append(unvisited[0])
+                visited.add(unvisited[0])
 
         self.model._vars = self.x
         self.model.Params.lazyConstraints = 1
-        self.model.optimize(_subtourelim)
+        # the user cuts are expressed on the original model
+        self.model.Params.PreCrush = 1
+        self.model.optimize(self.progress.callback(_subtourelim))
+        self.progress.finish(self.model)
+        record_size(
+            "tsp_model",
+            vars=self.model.NumVars,
+            constrs=self.model.NumConstrs,
+            nonzeros=self.model.NumNZs,
+        )
 
         # Create solution
         vals = self.model.getAttr("x", self.x)
         selected = gp.tuplelist((i, j) for i, j in vals.keys() if vals[i, j] > 0.5)
-        tour = _subtour(selected) + [0]
-        solution = create_solution(self.instance, tour)
+        self.tour = _tour(selected) + [0]
+        solution = create_solution(self.instance, self.tour)
         # to compute the objective value of the solution we have to sum the travel times
         objective_value = sum(
             solution["truck"][i][2] for i in range(len(solution["truck"]))
@@ -0,0 +1,163 @@
+import numpy as np
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from core.VRPWDData import VRPWDData
+from core.VRPWDSolution import VRPWDSolution
+from core.utils import available_cpu_count
+from algorithms.tsp.TSPLocalSearch import TSPLocalSearch, nearest_neighbors
+from algorithms.tsp.utils import create_solution, warm_start_tour
+from core.Tracer import traced
+
+# number of nearest unvisited nodes among which the randomized nearest neighbor rule
+# picks the next node
+CANDIDATES = 3
+# number of nearest neighbors searched by the local search
+NEIGHBORS = 8
+# state of a worker process (c.f. _init_worker)
+_WORKER = {}
+
+
+class TSPMultiStart:
+    """An implementation of a multi-start heuristic for the TSP: randomized nearest
+    neighbor and random insertion tours improved by the local search, run by a pool
+    of processes sharing the time matrix of the dpd nodes."""
+
+    def __init__(
+        self,
+        instance: VRPWDData,
+        warm_start: VRPWDSolution = None,
+        starts: int = None,
+        workers: int = None,
+        time_limit: float = 10,
+    ):
+        self.instance = instance
+        self.__algorithm = "Multi_Start_Local_Search"
+        self.warm_start = warm_start
+        # one worker per physical core by default
+        self.workers = available_cpu_count() if workers is None else workers
+        self.starts = 8 * self.workers if starts is None else starts
+        self.time_limit = time_limit
+
+    @traced("tsp_solve")
+    def solve(self) -> VRPWDSolution:
+        """Solve the TSP with starts tours built and improved in parallel, in at most
+        time_limit seconds"""
+
+        start = time.time()
+        deposit, dpd_nodes = self.instance.deposit, self.instance.dpd_nodes
+        # a demand on the deposit is delivered at the start of the tour
+        nodes = [i for i in range(1, len(dpd_nodes)) if dpd_nodes[i] != deposit]
+        initial_tours = [None] * self.starts
+        if self.warm_start is not None:
+            initial_tours[0] = warm_start_tour(
+                self.instance, self.warm_start.truck_stops()
+            )
+
+        matrix = self.instance.dpd_time_matrix
+        # built once here rather than in every worker
+        neighbor_lists = nearest_neighbors(matrix, NEIGHBORS)
+        memory = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+        try:
+            shared = np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=memory.buf)
+            shared[:] = matrix
+            # the view must be released before closing the shared memory
+            del shared
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(memory.name, matrix.shape, matrix.dtype.str, neighbor_lists),
+            ) as executor:
+                results = executor.map(
+                    _run_start,
+                    range(self.starts),
+                    [nodes] * self.starts,
+                    initial_tours,
+                    [start + self.time_limit] * self.starts,
+                )
+                # the starts beginning after the deadline are skipped
+                _, tour = min(result for result in results if result is not None)
+        finally:
+            memory.close()
+            memory.unlink()
+
+        solution = create_solution(self.instance, tour)
+        objective_value = sum(
+            solution["truck"][i][2] for i in range(len(solution["truck"]))
+        )
+        runtime = time.time() - start
+        return VRPWDSolution(
+            instance=self.instance,
+            algorithm=self.__algorithm,
+            objective_value=round(objective_value),
+            runtime=runtime,
+            gap="unknown",
+            solution=solution,
+            verbose=self.instance._VERBOSE,
+        )
+
+
+def _init_worker(name: str, shape: tuple, dtype: str, neighbor_lists: list):
+    """Attach the worker process to the shared time matrix and prepare its local
+    search, reading the shared matrix, once for all its starts"""
+
+    memory = shared_memory.SharedMemory(name=name)
+    _WORKER["memory"] = memory
+    _WORKER["matrix"] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    _WORKER["local_search"] = TSPLocalSearch(
+        _WORKER["matrix"], neighbor_lists=neighbor_lists
+    )
+
+
+def _run_start(seed: int, nodes: list, initial_tour: list, deadline: float) -> tuple:
+    """Return the (travel time, tour) of a start: the initial tour if given, else a
+    randomized tour built from the seed, improved by the local search. None if the
+    start begins after the deadline (the first one always runs)"""
+
+    if seed > 0 and time.time() >= deadline:
+        return None
+    matrix = _WORKER["matrix"]
+    rng = np.random.default_rng(seed)
+    if initial_tour is not None:
+        tour = initial_tour
+    elif seed % 2 == 0:
+        # the first start is the plain nearest neighbor tour
+        tour = _nearest_neighbor_tour(matrix, nodes, rng, 1 if seed == 0 else None)
+    else:
+        tour = _random_insertion_tour(matrix, nodes, rng)
+    local_search = _WORKER["local_search"]
+    local_search.time_limit = max(0.0, deadline - time.time())
+    tour = local_search.improve(tour)
+    return float(matrix[tour[:-1], tour[1:]].sum()), tour
+
+
+def _nearest_neighbor_tour(matrix, nodes: list, rng, candidates: int = None) -> list:
+    """Return a tour from and to the deposit (node 0) going to one of the nearest
+    unvisited nodes at random at each step"""
+
+    candidates = CANDIDATES if candidates is None else candidates
+    tour = [0]
+    unvisited = np.array(nodes)
+    while len(unvisited) > 0:
+        times = matrix[tour[-1], unvisited]
+        k = min(candidates, len(unvisited))
+        nearest = np.argpartition(times, k - 1)[:k]
+        # sorted, the choice does not depend on the order given by argpartition
+        index = rng.choice(nearest[np.argsort(times[nearest], kind="stable")])
+        tour.append(int(unvisited[index]))
+        unvisited[index] = unvisited[-1]
+        unvisited = unvisited[:-1]
+    return tour + [0]
+
+
+def _random_insertion_tour(matrix, nodes: list, rng) -> list:
+    """Return a tour from and to the deposit (node 0) built by inserting the nodes in a
+    random order where they lengthen it the least"""
+
+    tour = [0, 0]
+    for node in rng.permutation(nodes).tolist():
+        before, after = np.array(tour[:-1]), np.array(tour[1:])
+        increase = matrix[before, node] + matrix[node, after] - matrix[before, after]
+        tour.insert(int(np.argmin(increase)) + 1, node)
+    return tour
@@ -0,0 +1,155 @@
+import numpy as np
+
+from gurobipy import GRB
+from core.VRPWDData import VRPWDData
+from core.VRPWDSolution import VRPWDSolution
+from core.RoadNetwork import CACHE_VERSION
+from core.utils import atomic_write, available_cpu_count
+from algorithms.tsp.TSPMIPModel import TSPMIPModel
+from algorithms.tsp.utils import create_solution, warm_start_tour
+from core.Tracer import traced
+
+# status of a tour given by the user instead of solved, always reused and never
+# saved
+EXTERNAL = "external"
+
+
+class TSPTourCache:
+    """This class is used to share the TSP tour of an instance between the solvers
+    built on it: the tour is solved by the TSP MIP model once per instance content
+    and kept, with the gap and the status it was solved to, in memory and in a
+    binary file next to the instance (if its cache is on)."""
+
+    # tours already known in this process, by instance hash
+    __TOURS = {}
+    # off to solve the tour at each call, without reading nor saving any tour (e.g.
+    # to time the solves of a benchmark)
+    enabled = True
+
+    @classmethod
+    def _path(cls, instance: VRPWDData):
+        if instance.cache_dir is None:
+            return None
+        return instance.cache_dir.joinpath(
+            f"tsp_{instance.instance_hash[:16]}_v{CACHE_VERSION}.npz"
+        )
+
+    @classmethod
+    def clear(cls):
+        """Forget the tours known in this process (their files are kept)"""
+
+        cls.__TOURS.clear()
+
+    @classmethod
+    def get(cls, instance: VRPWDData) -> dict:
+        """Return the cached entry (tour, gap, status, runtime) of the instance, None
+        if its tour is not known"""
+
+        entry = cls.__TOURS.get(instance.instance_hash)
+        path = cls._path(instance)
+        if entry is None and path is not None and path.exists():
+            with np.load(path) as cache:
+                entry = {
+                    "tour": cache["tour"].tolist(),
+                    "gap": float(cache["gap"]),
+                    "status": str(cache["status"]),
+                    "runtime": float(cache["runtime"]),
+                }
+            # a file of another version of the dpd nodes is not a tour of them
+            if set(entry["tour"]) != _tour_nodes(instance):
+                return None
+            cls.__TOURS[instance.instance_hash] = entry
+        return entry
+
+    @classmethod
+    def put(
+        cls,
+        instance: VRPWDData,
+        tour: list,
+        gap: float,
+        status: str,
+        runtime: float,
+    ):
+        """Cache the tour (indices of dpd_nodes from and to the deposit) of the
+        instance, solved to the relative gap in runtime seconds"""
+
+        entry = {"tour": list(tour), "gap": gap, "status": status, "runtime": runtime}
+        cls.__TOURS[instance.instance_hash] = entry
+        path = cls._path(instance)
+        if path is None:
+            return
+        path.parent.mkdir(exist_ok=True)
+        # the parallel runs of a benchmark may solve and write the same tour
+        with atomic_write(path, "wb") as f:
+            np.savez(
+                f,
+                tour=np.asarray(tour, dtype=np.int32),
+                gap=gap,
+                status=status,
+                runtime=runtime,
+            )
+
+    @classmethod
+    def inject(cls, instance: VRPWDData, stops: list):
+        """Use the tour following the stops (road nodes, e.g. the truck stops of a
+        saved solution) instead of solving it in this process, the missing dpd nodes
+        being inserted where they lengthen it the least"""
+
+        tour = warm_start_tour(instance, stops)
+        cls.__TOURS[instance.instance_hash] = {
+            "tour": tour,
+            "gap": np.nan,
+            "status": EXTERNAL,
+            "runtime": 0.0,
+        }
+
+    @classmethod
+    @traced("tsp_cache")
+    def solve(
+        cls,
+        instance: VRPWDData,
+        warm_start: VRPWDSolution = None,
+        time_limit: int = 3600,
+        max_gap: float = 0.00001,
+        nb_threads: int = available_cpu_count(),
+    ) -> VRPWDSolution:
+        """Return the TSP solution of the instance from the cached tour if it was
+        given or solved to at most max_gap, else solve it with the TSP MIP model"""
+
+        entry = cls.get(instance) if cls.enabled else None
+        if entry is None or not (
+            entry["status"] == EXTERNAL or entry["gap"] <= max_gap
+        ):
+            model = TSPMIPModel(instance, warm_start)
+            solution = model.solve(time_limit, max_gap, nb_threads)
+            if solution is not None and cls.enabled:
+                status = "optimal" if model.model.Status == GRB.OPTIMAL else "feasible"
+                cls.put(
+                    instance, model.tour, model.model.MIPGap, status, solution.runtime
+                )
+            return solution
+
+        # a new solution each time, the solvers modify the moves of their tour. Its
+        # runtime is the one of the solve of the tour, the solvers built on it add it
+        # to their own
+        solution = create_solution(instance, entry["tour"])
+        objective_value = sum(move[2] for move in solution["truck"])
+        return VRPWDSolution(
+            instance=instance,
+            algorithm="MIP",
+            objective_value=round(objective_value),
+            runtime=entry["runtime"],
+            gap="unknown" if entry["status"] == EXTERNAL else entry["gap"] * 100,
+            solution=solution,
+            verbose=instance._VERBOSE,
+        )
+
+
+def _tour_nodes(instance: VRPWDData) -> set:
+    """Return the indices of the dpd nodes of a tour of the instance"""
+
+    return {0} | {
+        i
+        for i in range(1, len(instance.dpd_nodes))
+        if instance.dpd_nodes[i] != instance.deposit
+    }
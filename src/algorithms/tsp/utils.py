@@ -0,0 +1,40 @@
+import numpy as np
+
+from core.VRPWDData import VRPWDData
+from core.Tracer import traced
+
+
+@traced("solution_decode")
+def create_solution(instance: VRPWDData, tour: list) -> dict:
+    truck_solution = [instance.dpd_nodes[j] for j in tour]
+    solution = {"truck": [], "drone_1": [], "drone_2": []}
+    # create a dictionnary with the demand of each node
+    node_demands = {node: instance.demands.get(node, 0) for node in instance.dpd_nodes}
+    for i, x in enumerate(truck_solution[:-1]):
+        if x in node_demands.keys() and node_demands[x] > 0.0:
+            solution["truck"].append((x, x, 60, node_demands[x]))
+        y = truck_solution[i + 1]
+        # create final solution
+        solution["truck"].extend(instance.road_moves(x, y))
+    return solution
+
+
+def warm_start_tour(instance: VRPWDData, stops: list, served=()) -> list:
+    """Return a tour (indices of dpd_nodes from and to the deposit) following the
+    stops of a previous solution which are still dpd nodes, the other dpd nodes but
+    the served ones (e.g. by drones) being inserted where they lengthen it the least"""
+
+    index = {node: i for i, node in enumerate(instance.dpd_nodes)}
+    # a demand on the deposit is delivered at the start of the tour
+    index[instance.deposit] = 0
+    tour = list(dict.fromkeys([0] + [index[node] for node in stops if node in index]))
+    tour.append(0)
+    skipped = set(tour) | {index[node] for node in served if node in index}
+    matrix = instance.dpd_time_matrix
+    for i in range(1, len(instance.dpd_nodes)):
+        if i in skipped or instance.dpd_nodes[i] == instance.deposit:
+            continue
+        before, after = np.array(tour[:-1]), np.array(tour[1:])
+        increase = matrix[before, i] + matrix[i, after] - matrix[before, after]
+        tour.insert(int(np.argmin(increase)) + 1, i)
+    return tour
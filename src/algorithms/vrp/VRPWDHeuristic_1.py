@@ -1,26 +1,26 @@
-import networkx as nx
 import time
 
 from core.VRPWDData import VRPWDData
 from core.VRPWDSolution import VRPWDSolution
-from algorithms.tsp.TSPMIPModel import TSPMIPModel
+from algorithms.tsp.TSPTourCache import TSPTourCache
 from core.utils import verbose_print
+from core.Tracer import traced
 
 
 class VRPWDHeuristic_1:
-    def __init__(self, instance: VRPWDData):
+    def __init__(self, instance: VRPWDData, warm_start: VRPWDSolution = None):
         self.instance = instance
         self.__algorithm = "Basic_Greedy"
-        self.init_sol = TSPMIPModel(self.instance).solve()
+        self.init_sol = TSPTourCache.solve(self.instance, warm_start)
         self.demands_nodes = {
-            node: int(self.instance.graph.nodes[node]["demand"])
+            node: int(self.instance.demands[node])
             for node in self.instance.dpd_nodes[1:]
         }
-        self.graph = self.instance.graph.copy()
 
         global vprint
         vprint = verbose_print(self.instance._VERBOSE)
 
+    @traced("drone_assignment")
     def _compute_time_savings(self):
         truck_route = self.init_sol.solution["truck"]
         time_savings = []
@@ -34,33 +34,18 @@ class VRPWDHeuristic_1:
                 time_truck_deliver = truck_route[i + 1][-2]
                 time_truck_move_2 = truck_route[i + 2][-1]
                 time_drones_moves = self.demands_nodes[truck_route[i][1]] * (
-                    2
-                    * self.instance.drone_time_matrix[truck_route[i][0]][
-                        truck_route[i][1]
-                    ]
+                    2 * self.instance.drone_time(truck_route[i][0], truck_route[i][1])
                     + 30
                 )
                 if truck_route[i][0] == truck_route[i + 2][1]:
                     time_truck_move_3 = 0
                 else:
-                    try:
-                        # exclude the demand node from the path
-                        self.graph.remove_node(truck_route[i][1])
-                        time_truck_move_3 = nx.shortest_path_length(
-                            self.graph,
-                            truck_route[i][0],
-                            truck_route[i + 2][1],
-                            weight="travel_time",
-                            method="dijkstra",
-                        )
-                    # add the demand node back to the graph
-                    except nx.NetworkXNoPath:
-                        time_truck_move_3 = float("inf")
-                    finally:
-                        self.graph.add_node(
-                            truck_route[i][1],
-                            demand=self.demands_nodes[truck_route[i][1]],
-                        )
+                    # exclude the demand node from the path (inf if no path)
+                    time_truck_move_3 = self.instance.csr_graph.shortest_path_length(
+                        truck_route[i][0],
+                        truck_route[i + 2][1],
+                        excluded=truck_route[i][1],
+                    )
                 delta = (time_truck_move_1 + time_truck_deliver + time_truck_move_2) - (
                     time_drones_moves + time_truck_move_3
                 )
@@ -95,10 +80,12 @@ class VRPWDHeuristic_1:
             if self.demands_nodes[_tuple[1]] > 2:
                 time_savings.remove(_tuple)
 
-        vprint(f"Time savings: {time_savings}\n")
+        if self.instance._VERBOSE:
+            vprint(f"Time savings: {time_savings}\n")
 
         return time_savings
 
+    @traced("solution_decode")
     def _create_new_moves(self, time_savings):
         truck_route = self.init_sol.solution["truck"]
         new_truck_route = []
@@ -115,7 +102,7 @@ class VRPWDHeuristic_1:
             dst = truck_route[i][1]
             if (src, dst) in moves_to_change and len(truck_route[i + 1]) == 4:
                 new_dest = time_savings[moves_to_change.index((src, dst))][2]
-                drone_time_travel = self.instance.drone_time_matrix[src][dst]
+                drone_time_travel = self.instance.drone_time(src, dst)
                 time_to_wait = (2 * drone_time_travel) + 0.001
                 if self.demands_nodes[dst] == 1:
                     new_truck_route.append((src, src, 30, "d1"))
@@ -131,23 +118,7 @@ class VRPWDHeuristic_1:
                     drone_2_route.append((dst, src, drone_time_travel))
                     new_truck_route.append((src, src, time_to_wait))
                 if src != dst:
-                    new_route = nx.shortest_path(
-                        self.instance.graph,
-                        src,
-                        new_dest,
-                        weight="travel_time",
-                        method="dijkstra",
-                    )
-                    for j in range(len(new_route) - 1):
-                        new_truck_route.append(
-                            (
-                                new_route[j],
-                                new_route[j + 1],
-                                self.instance.graph.edges[
-                                    new_route[j], new_route[j + 1]
-                                ]["travel_time"],
-                            )
-                        )
+                    new_truck_route.extend(self.instance.road_moves(src, new_dest))
             # if one node of the move (the src or the dst) is delivered by a drone and the move is not mandatory to reach the destination, we pass
             elif (src in demands_nodes_delivered_by_drones) and len(
                 truck_route[i - 1]
@@ -165,8 +136,10 @@ class VRPWDHeuristic_1:
         return new_truck_route, drone_1_route, drone_2_route
 
     def solve(self) -> VRPWDSolution:
-        vprint(f"Initial solution: {self.init_sol.solution}\n")
-        vprint(f"Initial objective value: {self.init_sol.objective_value}\n")
+        if self.instance._VERBOSE:
+            # formatting the solution is as slow as the heuristic on large instances
+            vprint(f"Initial solution: {self.init_sol.solution}\n")
+            vprint(f"Initial objective value: {self.init_sol.objective_value}\n")
 
         start_time = time.time()
 
@@ -189,7 +162,8 @@ class VRPWDHeuristic_1:
         # i.e. the 3rd element of each tuple in the truck route
         objective_value = sum([move[2] for move in new_truck_route])
 
-        vprint(f"New solution: {solution}\n")
+        if self.instance._VERBOSE:
+            vprint(f"New solution: {solution}\n")
         vprint(f"New objective value: {objective_value:.2f}\n")
 
         # so a decrease in % of the objective value is:
@@ -1,14 +1,20 @@
 import time
-import networkx as nx
 
 from core.VRPWDData import VRPWDData
-from algorithms.tsp.TSPMIPModel import TSPMIPModel
+from algorithms.tsp.TSPTourCache import TSPTourCache
 from core.VRPWDSolution import VRPWDSolution
 from core.utils import verbose_print
+from core.Tracer import traced
 
 
 class VRPWDHeuristic_2:
-    def __init__(self, instance: VRPWDData, number_of_drones: int, policy: str):
+    def __init__(
+        self,
+        instance: VRPWDData,
+        number_of_drones: int,
+        policy: str,
+        warm_start: VRPWDSolution = None,
+    ):
         self.instance = instance
         self._available_policies = ["drone_inter", "truck_inter", "mix"]
         self.policy = policy
@@ -17,32 +23,31 @@ class VRPWDHeuristic_2:
         self.__algorithm = "Super_Node_Greedy"
         self.ordoned_demands_nodes = []
         self.number_of_drones = number_of_drones
-        self.init_sol = TSPMIPModel(self.instance).solve()
+        self.init_sol = TSPTourCache.solve(self.instance, warm_start)
 
         global vprint
         vprint = verbose_print(self.instance._VERBOSE)
 
+    @traced("drone_assignment")
     def first_stage(self, tour=None):
         """Create the vehicule-node affectation dictionary from a tour if given or from OPT(TSP) otherwise"""
 
         super_nodes_dict = {}
         demand_dict = {}
-        for node in self.instance.graph.nodes:
-            if self.instance.graph.nodes[node]["demand"] >= 1:
-                demand_dict[node] = self.instance.graph.nodes[node]["demand"]
-            if self.instance.graph.nodes[node]["demand"] > 1:
-                super_nodes_dict[node] = self.instance.graph.nodes[node]["demand"]
+        for node, demand in self.instance.demands.items():
+            if demand >= 1:
+                demand_dict[node] = demand
+            if demand > 1:
+                super_nodes_dict[node] = demand
         self.super_nodes_dict = super_nodes_dict
         if tour == None:
-            for i in range(len(self.init_sol.solution["truck"]) - 1):
+            truck = self.init_sol.solution["truck"]
+            for i in range(len(truck) - 1):
                 if (
-                    self.init_sol.solution["truck"][i][1] in self.instance.dpd_nodes[1:]
-                    and self.init_sol.solution["truck"][i][1]
-                    not in self.ordoned_demands_nodes
+                    truck[i][1] in self.instance.dpd_nodes[1:]
+                    and truck[i][1] not in self.ordoned_demands_nodes
                 ):
-                    self.ordoned_demands_nodes.append(
-                        self.init_sol.solution["truck"][i][1]
-                    )
+                    self.ordoned_demands_nodes.append(truck[i][1])
             # in case of deposit is a demand node
             if self.instance.deposit not in self.ordoned_demands_nodes:
                 self.ordoned_demands_nodes.insert(0, self.instance.deposit)
@@ -67,6 +72,7 @@ class VRPWDHeuristic_2:
         self.node_vehicle_dict = node_vehicle_dict
         return node_vehicle_dict
 
+    @traced("solution_decode")
     def second_stage(self, node_vehicle_dict):
         """Create the solution"""
 
@@ -75,28 +81,28 @@ class VRPWDHeuristic_2:
         for i in range(1, self.number_of_drones + 1):
             solution.setdefault("drone_{}".format(i), [])
         demand_dict = {}
-        for node in self.instance.graph.nodes:
-            if self.instance.graph.nodes[node]["demand"] >= 1:
-                demand_dict[node] = self.instance.graph.nodes[node]["demand"]
+        for node, demand in self.instance.demands.items():
+            if demand >= 1:
+                demand_dict[node] = demand
         truck_pair_dpd_nodes = []
+        # position of the first occurrence of each node in the ordered list
+        first_index = {}
+        for i, x in enumerate(self.ordoned_demands_nodes):
+            first_index.setdefault(x, i)
         for node in self.ordoned_demands_nodes:
             node_vehicle = node_vehicle_dict[node]
             if node_vehicle == 0:
                 truck_pair_dpd_nodes.append(node)
                 if len(truck_pair_dpd_nodes) == 2:
-                    sp_truck = nx.shortest_path(
-                        self.instance.graph,
-                        truck_pair_dpd_nodes[0],
-                        truck_pair_dpd_nodes[-1],
-                        weight="travel_time",
+                    sp_truck = self.instance.road_path(
+                        truck_pair_dpd_nodes[0], truck_pair_dpd_nodes[-1]
                     )
                     entire_dpd_nodes = [
                         x
                         for x in self.ordoned_demands_nodes
-                        if self.ordoned_demands_nodes.index(x)
-                        >= self.ordoned_demands_nodes.index(truck_pair_dpd_nodes[0])
-                        and self.ordoned_demands_nodes.index(x)
-                        <= self.ordoned_demands_nodes.index(truck_pair_dpd_nodes[1])
+                        if first_index[truck_pair_dpd_nodes[0]]
+                        <= first_index[x]
+                        <= first_index[truck_pair_dpd_nodes[1]]
                     ]
                     if (
                         node != self.instance.deposit
@@ -119,13 +125,13 @@ class VRPWDHeuristic_2:
                                 node_vehicle = node_vehicle_dict[node]
                                 drone_target[node_vehicle - 1] = node
                                 # compute travel time
-                                go = self.instance.drone_time_matrix[
-                                    truck_pair_dpd_nodes[0] - 1
-                                ][node - 1]
+                                go = self.instance.drone_time(
+                                    truck_pair_dpd_nodes[0], node
+                                )
                                 go_tt_list[node_vehicle - 1] = go
-                                back = self.instance.drone_time_matrix[node - 1][
-                                    truck_pair_dpd_nodes[1] - 1
-                                ]
+                                back = self.instance.drone_time(
+                                    node, truck_pair_dpd_nodes[1]
+                                )
                                 back_tt_list[node_vehicle - 1] = back
                     self.create_solution(
                         solution,
@@ -202,18 +208,25 @@ class VRPWDHeuristic_2:
                     )
                     solution["drone_{}".format(drone_number)].append(drone_back_move)
         # drone are launched or there is no drone to launch -> truck move toward its destination
-        for node in sp_truck:
+        # sp_truck is a shortest road path: the travel time between two consecutive
+        # nodes is the one of their edge
+        edge_times = self.instance.csr_graph.edge_times(sp_truck[:-1], sp_truck[1:])
+        edge_times = [round(t, 3) for t in edge_times.tolist()]
+        for k, node in enumerate(sp_truck):
             if len(solution["truck"]) == 0:
                 starting_node = self.instance.deposit
             else:
                 starting_node = solution["truck"][-1][1]
             # create move event
-            tt = round(
-                nx.shortest_path_length(
-                    self.instance.graph, starting_node, node, weight="travel_time"
-                ),
-                3,
-            )
+            if starting_node == node:
+                tt = 0
+            elif k > 0 and starting_node == sp_truck[k - 1]:
+                tt = edge_times[k - 1]
+            else:
+                tt = round(
+                    self.instance.csr_graph.shortest_path_length(starting_node, node),
+                    3,
+                )
             if tt != 0:
                 move_event = (starting_node, node, tt)
                 solution["truck"].append(move_event)
@@ -224,7 +237,12 @@ class VRPWDHeuristic_2:
             if node == truck_destination:
                 if node in demand_dict.keys():
                     # create delivery event
-                    delivery_event = (node, node, delivering_truck_time)
+                    delivery_event = (
+                        node,
+                        node,
+                        delivering_truck_time,
+                        demand_dict[node],
+                    )
                     truck_chrono = [
                         truck_chrono[i] + delivering_truck_time
                         if launched_drones[i]
@@ -289,6 +307,7 @@ class VRPWDHeuristic_2:
                             )
                             solution["truck"].append(waiting_truck_event)
 
+    @traced("improvement")
     def _improve_affectation(self, solution, node_vehicle_dict):
         """Improve the affectation node-vehicle for a given tour"""
 
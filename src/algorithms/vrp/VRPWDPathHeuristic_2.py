@@ -1,21 +1,23 @@
 import time
 import gurobipy as gp
-import networkx as nx
 
 from core.VRPWDData import VRPWDData
-from algorithms.tsp.TSPMIPModel import TSPMIPModel
+from algorithms.tsp.TSPTourCache import TSPTourCache
 from core.VRPWDSolution import VRPWDSolution
 from gurobipy import GRB
 from core.utils import available_cpu_count, verbose_print
+from core.MIPProgress import MIPProgress
+from core.Tracer import record_size, span, traced
 
 
 class VRPWDPathHeuristic_2:
-    def __init__(self, instance: VRPWDData):
+    def __init__(self, instance: VRPWDData, warm_start: VRPWDSolution = None):
         self.instance = instance
         self.__algorithm = "Path_Heuristic"
-        self.tsp_solution = TSPMIPModel(self.instance).solve()
+        self.tsp_solution = TSPTourCache.solve(self.instance, warm_start)
         self.init_sol = self.tsp_solution.solution
         self.init_runtime = self.tsp_solution.runtime
+        self.progress = MIPProgress()
         # first and last tuples of truck are (depot, depot, 0, 0) to signal start and stop.
         # useful for the heuristic
         self.init_sol["truck"].append((instance.deposit, instance.deposit, 0.0, 0.0))
@@ -27,6 +29,7 @@ class VRPWDPathHeuristic_2:
         global vprint
         vprint = verbose_print(self.instance._VERBOSE)
 
+    @traced("solution_decode")
     def _create_solution(self, selected_paths: dict, gained_time):
         solution = {"truck": [], "drone_1": [], "drone_2": []}
         last_drone_used = 2
@@ -46,11 +49,11 @@ class VRPWDPathHeuristic_2:
                 solution["truck"].append(
                     (start_node, start_node, 30, "d" + str(drone_to_use))
                 )
-                go_time = self.instance.drone_time_matrix[start_node - 1][d_node - 1]
+                go_time = self.instance.drone_time(start_node, d_node)
                 solution["drone_" + str(drone_to_use)].append(
                     (start_node, d_node, go_time)
                 )
-                back_time = self.instance.drone_time_matrix[d_node - 1][end_node - 1]
+                back_time = self.instance.drone_time(d_node, end_node)
                 solution["drone_" + str(drone_to_use)].append(
                     (d_node, end_node, back_time)
                 )
@@ -61,18 +64,8 @@ class VRPWDPathHeuristic_2:
             solution["truck"].append(
                 init_truck[path["start_index"]]
             )  # t == path["start_index"]
-            sp = nx.shortest_path(
-                self.instance.graph,
-                start_node,
-                end_node,
-                weight="travel_time",
-                method="dijkstra",
-            )
             # create final solution
-            for j, a in enumerate(sp[:-1]):
-                b = sp[j + 1]
-                time = self.instance.graph.edges[a, b]["travel_time"]
-                solution["truck"].append((a, b, time))
+            solution["truck"].extend(self.instance.road_moves(start_node, end_node))
             wait_time = (
                 path["new_cost"] - path["truck_cost"] + gained_time[p]
             )  # gained_time is negative, thus reduced wait time
@@ -88,6 +81,7 @@ class VRPWDPathHeuristic_2:
                 solution["truck"].remove(tup)
         return solution
 
+    @traced("paths_preprocess")
     def _init_sol_demand_paths(self, demand_limit=2):
         truck = self.init_sol["truck"]
         complete_paths = []
@@ -131,9 +125,7 @@ class VRPWDPathHeuristic_2:
                         path_start_index.pop(p)
                     else:
                         incomplete_paths[p].append(step)
-                        inc_pth_cml_demand[p] += self.instance.graph.nodes[step[0]][
-                            "demand"
-                        ]
+                        inc_pth_cml_demand[p] += self.instance.demands.get(step[0], 0)
                 incomplete_paths.append([step])
                 inc_pth_cml_demand.append(0)
                 path_start_index.append(i)
@@ -156,16 +148,16 @@ class VRPWDPathHeuristic_2:
                     d_nodes.append(path[i][0])
         drone1_cost = (
             30
-            + self.instance.drone_time_matrix[start_node - 1][d_nodes[0] - 1]
-            + self.instance.drone_time_matrix[d_nodes[0] - 1][end_node - 1]
+            + self.instance.drone_time(start_node, d_nodes[0])
+            + self.instance.drone_time(d_nodes[0], end_node)
         )
         nb_drones_used = 1
         drone2_cost = 0
         if len(d_nodes) > 1:
             drone2_cost = (
                 30
-                + self.instance.drone_time_matrix[start_node - 1][d_nodes[1] - 1]
-                + self.instance.drone_time_matrix[d_nodes[1] - 1][end_node - 1]
+                + self.instance.drone_time(start_node, d_nodes[1])
+                + self.instance.drone_time(d_nodes[1], end_node)
             )
             nb_drones_used = 2
             if drone2_cost < drone1_cost:
@@ -235,11 +227,24 @@ class VRPWDPathHeuristic_2:
                     iptg_matrix[i][j] = -min(possible_gain, arrival_window)
         return iptg_matrix
 
+    def _greedy_selection(self, paths_info: list, overlap_matrix: list) -> set:
+        """Return the paths selected by decreasing time gain (negative gain), skipping
+        the ones overlapping an already selected path, until a path gains no time"""
+
+        selected = set()
+        for i in sorted(range(len(paths_info)), key=lambda i: paths_info[i]["gain"]):
+            if paths_info[i]["gain"] >= 0:
+                break
+            if not any(overlap_matrix[i][j] for j in selected):
+                selected.add(i)
+        return selected
+
     def solve(
         self,
         time_limit: int = 3600,
         max_gap: float = 0.00001,
         nb_threads: int = available_cpu_count(),
+        greedy_start: bool = False,
     ):
         start_preprocess_time = time.time()
         paths_info = self._init_sol_demand_paths()
@@ -282,8 +287,23 @@ class VRPWDPathHeuristic_2:
         model.Params.TimeLimit = time_limit
         model.Params.MIPGap = max_gap
         model.Params.Threads = nb_threads
+        if greedy_start:
+            # z is left to Gurobi, which completes the partial start
+            selected = self._greedy_selection(paths_info, overlap_matrix)
+            for i in paths:
+                x[i].Start = int(i in selected)
+            for i, j in ipg_time.keys():
+                y[i, j].Start = int(i in selected and j in selected)
 
-        model.optimize()
+        with span("drone_assignment"):
+            model.optimize(self.progress.callback())
+            self.progress.finish(model)
+            record_size(
+                "paths_model",
+                vars=model.NumVars,
+                constrs=model.NumConstrs,
+                nonzeros=model.NumNZs,
+            )
 
         # create solution
         x_vals = model.getAttr("x", x)
@@ -1,14 +1,17 @@
 import gurobipy as gp
-import networkx as nx
 
 from gurobipy import GRB
 from itertools import permutations
 from core.VRPWDData import VRPWDData
 from core.VRPWDSolution import VRPWDSolution
+from algorithms.tsp.utils import warm_start_tour
 from core.utils import verbose_print, available_cpu_count
+from core.MIPProgress import MIPProgress
+from core.Tracer import record_size, span, traced
 
 
 class VRPWDReducedMIPModel_1:
+    @traced("solution_decode")
     def _create_solution(self, tour: list, drone_covered: dict) -> dict:
         truck_solution = [self.instance.dpd_nodes[j] for j in tour]
         node_covers = {
@@ -20,8 +23,7 @@ class VRPWDReducedMIPModel_1:
         solution = {"truck": [], "drone_1": [], "drone_2": []}
         # create a dictionnary with the demand of each node
         node_demands = {
-            node: self.instance.graph.nodes[node]["demand"]
-            for node in self.instance.dpd_nodes
+            node: self.instance.demands.get(node, 0) for node in self.instance.dpd_nodes
         }
         for i, x in enumerate(truck_solution[:-1]):
             # assuming the drone delivery nodes are ordered by decreasing furthest distance
@@ -40,7 +42,7 @@ class VRPWDReducedMIPModel_1:
                             0, drone_availability[drone] - wait_time - 30
                         )
                     z = node_covers[x].pop()
-                    go_time = self.instance.drone_time_matrix[x - 1][z - 1]
+                    go_time = self.instance.drone_time(x, z)
                     solution["drone_" + str(drone_to_use)].append((x, z, go_time))
                     solution["drone_" + str(drone_to_use)].append((z, x, go_time))
                     drone_availability[drone_to_use] += 2 * go_time
@@ -68,16 +70,10 @@ class VRPWDReducedMIPModel_1:
 
             # then we make our way to the next demand node
             y = truck_solution[i + 1]
-            sp = nx.shortest_path(
-                self.instance.graph, x, y, weight="travel_time", method="dijkstra"
-            )
-            for j, a in enumerate(sp[:-1]):
-                b = sp[j + 1]
-                transit_time = self.instance.graph.edges[a, b]["travel_time"]
-                solution["truck"].append((a, b, transit_time))
+            solution["truck"].extend(self.instance.road_moves(x, y))
         return solution
 
-    def __init__(self, instance: VRPWDData):
+    def __init__(self, instance: VRPWDData, warm_start: VRPWDSolution = None):
         self.instance = instance
         self.__algorithm = "Reduced_MIP"
         self.model = gp.Model("VRPWDR")
@@ -91,12 +87,10 @@ class VRPWDReducedMIPModel_1:
             for i, j in permutations(self.nodes, 2)
         }
         self.demand = {
-            i: instance.graph.nodes[instance.dpd_nodes[i]]["demand"] for i in self.nodes
+            i: instance.demands.get(instance.dpd_nodes[i], 0) for i in self.nodes
         }
         self.drone_time = {
-            (i, j): instance.drone_time_matrix[instance.dpd_nodes[i] - 1][
-                instance.dpd_nodes[j] - 1
-            ]
+            (i, j): instance.drone_time(instance.dpd_nodes[i], instance.dpd_nodes[j])
             for i, j in permutations(self.nodes, 2)
             if self.demand[j] > 0
         }
@@ -167,13 +161,53 @@ class VRPWDReducedMIPModel_1:
             for i in self.nodes
             if self.demand[i] > 0
         )
+        self.progress = MIPProgress()
+        if warm_start is not None:
+            self._set_warm_start(warm_start)
+
+    def _set_warm_start(self, warm_start: VRPWDSolution):
+        """Start the search from the truck tour and the drone trips of a previous
+        solution, the demand nodes it does not serve being added to the tour"""
+
+        index = {node: i for i, node in enumerate(self.instance.dpd_nodes)}
+        index[self.instance.deposit] = 0
+        drone_vars = {1: self.y1, 2: self.y2}
+        trips = {}
+        for drone, src, dest in warm_start.drone_trips():
+            key = (drone, index.get(src), index.get(dest))
+            if drone in drone_vars and key[1:] in drone_vars[drone]:
+                trips[key] = trips.get(key, 0) + 1
+        served = [self.instance.dpd_nodes[j] for _, _, j in trips]
+        tour = warm_start_tour(self.instance, warm_start.truck_stops(), served)
+        for var in self.x.values():
+            var.Start = 0
+        for i, j in zip(tour[:-1], tour[1:]):
+            self.x[i, j].Start = 1
+        launches = {(drone, i): 0 for drone in drone_vars for i in self.nodes}
+        flights = dict(launches)
+        for drone, variables in drone_vars.items():
+            for (i, j), var in variables.items():
+                var.Start = n = min(trips.get((drone, i, j), 0), self.max_demand[i, j])
+                launches[drone, i] += n
+                flights[drone, i] += 2 * self.drone_time[i, j] * n
+        # smallest delivery time at each node given the launches of its drones
+        visited = set(tour[1:])
+        for i in self.nodes:
+            delivery = 60 if self.demand[i] > 0 and i in visited else 0
+            self.T[i].Start = max(
+                max(30 * launches[d, i] + flights[d, i] for d in drone_vars),
+                30 * sum(launches[d, i] for d in drone_vars) + delivery,
+            )
 
     def solve(
         self,
         time_limit: int = 3600,
         max_gap: float = 0.00001,
         nb_threads: int = available_cpu_count(),
+        warm_start: VRPWDSolution = None,
     ) -> VRPWDSolution:
+        if warm_start is not None:
+            self._set_warm_start(warm_start)
         verbose = self.instance._VERBOSE
         vprint = verbose_print(verbose)
         vprint(
@@ -275,7 +309,15 @@ class VRPWDReducedMIPModel_1:
 
         self.model._vars = [self.x, self.y1, self.y2]
         self.model.Params.lazyConstraints = 1
-        self.model.optimize(_subtourelim)
+        with span("mip_optimize"):
+            self.model.optimize(self.progress.callback(_subtourelim))
+            self.progress.finish(self.model)
+            record_size(
+                "vrp_mip_model",
+                vars=self.model.NumVars,
+                constrs=self.model.NumConstrs,
+                nonzeros=self.model.NumNZs,
+            )
 
         # Create solution
         vals = self.model.getAttr("x", self.x)
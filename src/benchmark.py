@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+from core.Tracer import TRACER, PeakRSS, span
+from core.VRPWDData import VRPWDData
+from core.utils import available_cpu_count
+from vrpwdSolver import METHOD_ALIASES, METHODS, load_method
+
+# columns of the result table
+FIELDS = [
+    "instance",
+    "case",
+    "method",
+    "repeat",
+    "load_time",
+    "solve_time",
+    "check_time",
+    "write_time",
+    "total_time",
+    "solver_runtime",
+    "peak_rss_mb",
+    "memory_peak_mb",
+    "over_budget",
+    "objective",
+    "gap",
+    "feasible",
+    "error",
+]
+
+# instances already loaded by this worker process, by (instance_dir, case)
+_INSTANCES = {}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Run the VRPWD solvers on a grid of instances x cases x methods "
+        "x repeats and write the results in a CSV and a JSON table"
+    )
+    parser.add_argument(
+        "instances",
+        nargs="+",
+        help="instance directories, or directories containing instance directories",
+    )
+    parser.add_argument(
+        "-c", "--cases", nargs="+", type=int, default=[0], help="cases to solve"
+    )
+    parser.add_argument(
+        "-m", "--methods", nargs="+", default=["heuristic"], help="methods to run"
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=1, help="number of runs of each cell"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=available_cpu_count(),
+        help="number of worker processes (default: number of physical cores)",
+    )
+    parser.add_argument(
+        "-t",
+        "--trace",
+        action="store_true",
+        help="save the timing spans of each run in a Chrome trace file "
+        "(<output>_traces/<instance>_<case>_<method>_<repeat>.json)",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="record the memory usage of each stage (slower) and write it next to "
+        "the solutions",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        help="fail the runs whose peak of Python allocations is over this budget "
+        "(MB), implies --memory",
+    )
+    parser.add_argument(
+        "-p",
+        "--plot",
+        choices=("png", "svg"),
+        help="save the plot of each solution next to it, rendered in the background "
+        "while the worker runs its next solve",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="solve the TSP tour in every run instead of reusing the tour of a "
+        "previous run or repeat, so that the solve times of all the rows compare",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="log/benchmark",
+        help="path of the result tables, without extension (default: log/benchmark)",
+    )
+    return parser.parse_args()
+
+
+def find_instances(paths: list) -> list:
+    """Return the instance directories (i.e. containing a map.json file) of paths"""
+
+    instances = []
+    for path in map(Path, paths):
+        if path.joinpath("map.json").exists():
+            instances.append(path)
+        else:
+            instances.extend(
+                sorted(p.parent for p in path.glob("*/map.json")),
+            )
+    return [str(instance) for instance in instances]
+
+
+def load_instance(instance_dir: str, case: int) -> VRPWDData:
+    """Return the instance, loaded only once per worker process"""
+
+    if (instance_dir, case) not in _INSTANCES:
+        _INSTANCES[instance_dir, case] = VRPWDData(instance_dir, case, False)
+    return _INSTANCES[instance_dir, case]
+
+
+def run(
+    instance_dir: str,
+    case: int,
+    method: str,
+    repeat: int,
+    trace_dir: str = None,
+    memory_budget: float = None,
+    plot: str = None,
+    tour_cache: bool = True,
+) -> dict:
+    """Solve an instance with a method and return its row of the result table, and
+    save its trace in trace_dir if given. memory_budget (MB) is only checked if the
+    memory accounting is on (memory_budget=inf to only record it). plot is the
+    extension (png or svg) of the plot of the solution, rendered in the background.
+    If not tour_cache, the TSP tour is solved again instead of read from its cache"""
+
+    row = dict.fromkeys(FIELDS)
+    row.update(instance=Path(instance_dir).name, case=case, method=method)
+    row.update(repeat=repeat, feasible=False)
+    memory = memory_budget is not None
+    if trace_dir is not None or memory:
+        TRACER.enable(memory=memory)
+    start = time.perf_counter()
+    peak_rss = PeakRSS()
+    try:
+        # the solvers print their progress, only the table is of interest here
+        with contextlib.redirect_stdout(io.StringIO()), peak_rss:
+            phase_start = time.perf_counter()
+            with span("load"):
+                data = load_instance(instance_dir, case)
+            if memory:
+                data.record_sizes()
+            row["load_time"] = time.perf_counter() - phase_start
+
+            solver, args, has_gap = load_method(case, method)
+            if not tour_cache:
+                from algorithms.tsp.TSPTourCache import TSPTourCache
+
+                TSPTourCache.enabled = False
+            phase_start = time.perf_counter()
+            with span("solve", method=method):
+                solution = solver(data, *args).solve()
+            row["solve_time"] = time.perf_counter() - phase_start
+
+            phase_start = time.perf_counter()
+            with span("check"):
+                row["feasible"] = bool(solution.check())
+            row["check_time"] = time.perf_counter() - phase_start
+
+            phase_start = time.perf_counter()
+            with span("write"):
+                solution.write()
+            row["write_time"] = time.perf_counter() - phase_start
+            if plot is not None:
+                # the worker process waits for its rendering threads before exiting
+                solution.save_plot(plot, background=True)
+            if memory:
+                solution.write_memory_report(TRACER.memory_report())
+        row["solver_runtime"] = solution.runtime
+        row["objective"] = solution.objective_value
+        row["gap"] = solution.gap if has_gap else None
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["total_time"] = time.perf_counter() - start
+    # peak of the worker process during this run only
+    row["peak_rss_mb"] = peak_rss.peak_mb
+    if memory:
+        peaks = [stage["peak_mb"] for stage in TRACER.memory_report()["stages"]]
+        row["memory_peak_mb"] = max(peaks, default=0)
+        row["over_budget"] = row["memory_peak_mb"] > memory_budget
+    if trace_dir is not None or memory:
+        TRACER.disable()
+    if trace_dir is not None:
+        TRACER.export(
+            Path(trace_dir, f"{row['instance']}_{case}_{method}_{repeat}.json")
+        )
+    return row
+
+
+def write_results(rows: list, output: str, fields: list = FIELDS):
+    """Write the result table (columns fields) in <output>.csv and <output>.json"""
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(output + ".json", "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Results written in {output}.csv and {output}.json")
+
+
+def main():
+    args = parse_arguments()
+    instances = find_instances(args.instances)
+    methods = [METHOD_ALIASES.get(method, method) for method in args.methods]
+    grid = [
+        (instance, case, method, repeat)
+        for instance, case, method, repeat in product(
+            instances, args.cases, methods, range(args.repeats)
+        )
+        if (case, method) in METHODS
+    ]
+    if not grid:
+        print("Error: no (case, method) of the grid is available")
+        return
+
+    print("Experimental Campaign:")
+    print(f"Instances: {len(instances)}; Cases: {args.cases}; Methods: {methods}")
+    print(f"Runs: {len(grid)}; Workers: {args.workers}")
+    # build the preprocessing caches once, before the workers read them, with the
+    # drone matrix of the instances solved in a case with drones
+    drone_instances = {instance for instance, case, _, _ in grid if case > 0}
+    for instance in instances:
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = VRPWDData(instance, 0, False)
+            if instance in drone_instances:
+                data.drone_time_matrix
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        trace_dir = args.output + "_traces" if args.trace else None
+        memory_budget = args.memory_budget
+        if memory_budget is None and args.memory:
+            memory_budget = float("inf")
+        rows = list(
+            executor.map(
+                run,
+                *zip(*grid),
+                [trace_dir] * len(grid),
+                [memory_budget] * len(grid),
+                [args.plot] * len(grid),
+                [not args.no_cache] * len(grid),
+            )
+        )
+    for row in rows:
+        status = row["error"] or f"objective={row['objective']}"
+        print(
+            f"{row['instance']} case={row['case']} method={row['method']} "
+            f"repeat={row['repeat']}: {status}; total_time={row['total_time']:.2f}sec"
+        )
+    write_results(rows, args.output)
+    over_budget = [row for row in rows if row["over_budget"]]
+    if over_budget:
+        print(f"Error: {len(over_budget)} runs are over the memory budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
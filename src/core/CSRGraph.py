@@ -0,0 +1,264 @@
+import numpy as np
+
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+
+class CSRGraph:
+    """This class is used to store a weighted undirected road graph in compressed
+    sparse row arrays: the neighbors of the node i (nodes are numbered from 1) are
+    indices[indptr[i-1]:indptr[i]] + 1 (sorted), with the travel times in the same
+    slice of travel_time."""
+
+    def __init__(self, indptr, indices, travel_time, coordinates):
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.travel_time = np.asarray(travel_time, dtype=np.float64)
+        self.coordinates = np.asarray(coordinates, dtype=np.float64)
+        n = self.number_of_nodes
+        self.matrix = csr_matrix(
+            (self.travel_time, self.indices, self.indptr), shape=(n, n)
+        )
+        # sorted (row, column) keys of the arcs, for vectorized edge lookups
+        self.__arc_rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr))
+        self.__arc_keys = self.__arc_rows * n + self.indices
+
+    @classmethod
+    def from_edges(cls, src, dest, travel_time, coordinates):
+        """Create the graph from edge arrays, keeping nx.Graph semantics: self-loops
+        are dropped and the last of parallel edges wins"""
+
+        n = len(coordinates)
+        src, dest = np.asarray(src), np.asarray(dest)
+        travel_time = np.asarray(travel_time, dtype=np.float64)
+        loops = src == dest
+        u = np.minimum(src, dest)[~loops] - 1
+        v = np.maximum(src, dest)[~loops] - 1
+        travel_time = travel_time[~loops]
+        # last occurrence of each edge
+        keys = u.astype(np.int64) * n + v
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        u, v, travel_time = u[last], v[last], travel_time[last]
+        matrix = csr_matrix(
+            (
+                np.concatenate((travel_time, travel_time)),
+                (np.concatenate((u, v)), np.concatenate((v, u))),
+            ),
+            shape=(n, n),
+        )
+        matrix.sort_indices()
+        return cls(matrix.indptr, matrix.indices, matrix.data, coordinates)
+
+    def __str__(self) -> str:
+        return f"CSRGraph(nodes={self.number_of_nodes}, edges={self.number_of_edges})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.indices) // 2
+
+    @property
+    def nbytes(self) -> int:
+        """Size in bytes of the arrays of the graph"""
+
+        arrays = (self.indptr, self.indices, self.travel_time, self.coordinates)
+        return sum(array.nbytes for array in arrays)
+
+    def neighbors(self, node: int):
+        """Return the neighbors of a node"""
+
+        return self.indices[self.indptr[node - 1] : self.indptr[node]] + 1
+
+    def edge_row(self, node: int):
+        """Return the travel times of the edges to the neighbors of a node"""
+
+        return self.travel_time[self.indptr[node - 1] : self.indptr[node]].tolist()
+
+    def edge_times(self, src, dest):
+        """Return the travel times of the edges (src[k], dest[k]), inf if no such edge"""
+
+        src = np.asarray(src, dtype=np.int64) - 1
+        dest = np.asarray(dest, dtype=np.int64) - 1
+        keys = src * self.number_of_nodes + dest
+        pos = np.searchsorted(self.__arc_keys, keys)
+        pos = np.minimum(pos, len(self.__arc_keys) - 1)
+        found = self.__arc_keys[pos] == keys
+        return np.where(found, self.travel_time[pos], np.inf)
+
+    def edge_time(self, src: int, dest: int) -> float:
+        """Return the travel time of the edge (src, dest), inf if no such edge"""
+
+        return float(self.edge_times(src, dest))
+
+    def path_length(self, path) -> float:
+        """Return the travel time along a path given as a list of nodes"""
+
+        return float(np.sum(self.edge_times(path[:-1], path[1:])))
+
+    def contract(self, keep=()):
+        """Return the graph with its chains of degree-2 nodes merged into single
+        edges, the nodes to keep (e.g. deposit and demands) being never merged"""
+
+        return ContractedGraph.from_graph(self, keep)
+
+    def _without_node(self, node: int):
+        """Return the adjacency matrix without the edges incident to node"""
+
+        keep = (self.__arc_rows != node - 1) & (self.indices != node - 1)
+        counts = np.bincount(self.__arc_rows[keep], minlength=self.number_of_nodes)
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        n = self.number_of_nodes
+        return csr_matrix(
+            (self.travel_time[keep], self.indices[keep], indptr), shape=(n, n)
+        )
+
+    def shortest_path_tree(self, sources, excluded: int = None):
+        """Run Dijkstra from each source node, return the distances and predecessors
+        arrays (one row per source, one column per node, -9999 for no predecessor)"""
+
+        matrix = self.matrix if excluded is None else self._without_node(excluded)
+        return dijkstra(
+            matrix, indices=np.asarray(sources) - 1, return_predecessors=True
+        )
+
+    def shortest_path(self, src: int, dest: int, excluded: int = None) -> list:
+        """Return the shortest path from src to dest as a list of nodes"""
+
+        _, predecessors = self.shortest_path_tree(src, excluded)
+        return walk_predecessors(predecessors, src, dest)
+
+    def shortest_path_length(self, src: int, dest: int, excluded: int = None) -> float:
+        """Return the travel time of the shortest path from src to dest, inf if no path
+        (avoiding the node excluded if given)"""
+
+        matrix = self.matrix if excluded is None else self._without_node(excluded)
+        return float(dijkstra(matrix, indices=src - 1)[dest - 1])
+
+
+def walk_predecessors(predecessors, src: int, dest: int) -> list:
+    """Rebuild the path from src to dest by walking back the predecessors array of the
+    shortest path tree rooted at src"""
+
+    path = [dest]
+    current = dest - 1
+    while current != src - 1:
+        current = predecessors[current]
+        if current < 0:
+            raise ValueError(f"No path between {src} and {dest}")
+        path.append(int(current) + 1)
+    path.reverse()
+    return path
+
+
+class ContractedGraph(CSRGraph):
+    """This class is used to store a graph whose chains of degree-2 nodes have been
+    merged into single edges: its node i is the node nodes[i-1] of the original graph,
+    and chains[(u, v)] is the sequence of original nodes collapsed between u and v."""
+
+    def __init__(self, indptr, indices, travel_time, coordinates, nodes, chains):
+        super().__init__(indptr, indices, travel_time, coordinates)
+        self.nodes = np.asarray(nodes, dtype=np.int64)
+        self.chains = chains
+        # contracted id of each original node, 0 if collapsed in a chain
+        self.index = np.zeros(self.nodes.max(initial=0) + 1, dtype=np.int64)
+        self.index[self.nodes] = np.arange(1, len(self.nodes) + 1)
+
+    @classmethod
+    def from_graph(cls, graph: CSRGraph, keep=()):
+        """Contract the degree-2 nodes of a graph, except the nodes to keep"""
+
+        kept = np.diff(graph.indptr) != 2
+        kept[np.asarray(keep, dtype=np.int64) - 1] = True
+        nodes = np.flatnonzero(kept) + 1
+        # walk each chain from both of its ends
+        edges, chains = [], {}
+        for u in nodes.tolist():
+            for v, time in zip(graph.neighbors(u).tolist(), graph.edge_row(u)):
+                previous, inner = u, []
+                while not kept[v - 1]:
+                    inner.append(v)
+                    w, other = graph.neighbors(v).tolist()
+                    nxt = other if w == previous else w
+                    time += graph.edge_time(v, nxt)
+                    previous, v = v, nxt
+                if v != u:
+                    edges.append((u, v, time, inner))
+        # the last of parallel edges wins: sort them by decreasing travel time
+        edges.sort(key=lambda edge: -edge[2])
+        for u, v, _, inner in edges:
+            chains[u, v] = inner
+        rank = np.zeros(graph.number_of_nodes + 1, dtype=np.int64)
+        rank[nodes] = np.arange(1, len(nodes) + 1)
+        src = rank[[edge[0] for edge in edges]]
+        dest = rank[[edge[1] for edge in edges]]
+        contracted = CSRGraph.from_edges(
+            src,
+            dest,
+            [edge[2] for edge in edges],
+            graph.coordinates[nodes - 1],
+        )
+        return cls(
+            contracted.indptr,
+            contracted.indices,
+            contracted.travel_time,
+            contracted.coordinates,
+            nodes,
+            {key: inner for key, inner in chains.items() if inner},
+        )
+
+    def arrays(self) -> dict:
+        """Return the arrays of the graph and of its chains, e.g. to save it in a
+        cache file (c.f. from_arrays)"""
+
+        keys = list(self.chains)
+        lengths = [len(self.chains[key]) for key in keys]
+        return {
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "travel_time": self.travel_time,
+            "coordinates": self.coordinates,
+            "nodes": self.nodes,
+            "chain_keys": np.array(keys, dtype=np.int64).reshape(-1, 2),
+            "chain_offsets": np.cumsum([0] + lengths, dtype=np.int64),
+            "chain_nodes": np.array(
+                [node for key in keys for node in self.chains[key]], dtype=np.int64
+            ),
+        }
+
+    @classmethod
+    def from_arrays(
+        cls,
+        indptr,
+        indices,
+        travel_time,
+        coordinates,
+        nodes,
+        chain_keys,
+        chain_offsets,
+        chain_nodes,
+    ):
+        """Return the graph of the arrays given by arrays()"""
+
+        offsets, chain_nodes = chain_offsets.tolist(), chain_nodes.tolist()
+        chains = {
+            (u, v): chain_nodes[offsets[k] : offsets[k + 1]]
+            for k, (u, v) in enumerate(chain_keys.tolist())
+        }
+        return cls(indptr, indices, travel_time, coordinates, nodes, chains)
+
+    def expand(self, path) -> list:
+        """Return the original nodes of a path given as a list of contracted nodes"""
+
+        path = self.nodes[np.asarray(path, dtype=np.int64) - 1].tolist()
+        expanded = path[:1]
+        for u, v in zip(path[:-1], path[1:]):
+            expanded.extend(self.chains.get((u, v), ()))
+            expanded.append(v)
+        return expanded
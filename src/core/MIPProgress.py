@@ -0,0 +1,74 @@
+from gurobipy import GRB
+
+
+class MIPProgress:
+    """This class is used to record the progress of a Gurobi optimization from its
+    callback: the times (seconds of Gurobi runtime) of the first incumbent and of
+    reaching the target gap, None if they were not reached. The first incumbent is
+    timed when it is found (MIPSOL), not at the next callback showing it."""
+
+    def __init__(self, target_gap: float = 0.01):
+        self.target_gap = target_gap
+        self.first_incumbent_time = None
+        self.target_gap_time = None
+        # (runtime, objective) of the solutions found before the first incumbent is
+        # known, some of them being possibly rejected by lazy constraints
+        self.__solutions = []
+
+    def callback(self, callback=None):
+        """Return a Gurobi callback recording the progress, then calling callback"""
+
+        def _callback(model, where):
+            self.record(model, where)
+            if callback is not None:
+                callback(model, where)
+
+        return _callback
+
+    def record(self, model, where):
+        if where == GRB.Callback.MIPSOL:
+            best = model.cbGet(GRB.Callback.MIPSOL_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+        elif where == GRB.Callback.MIP:
+            best = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        elif where == GRB.Callback.MIPNODE:
+            best = model.cbGet(GRB.Callback.MIPNODE_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIPNODE_OBJBND)
+        else:
+            return
+        runtime = model.cbGet(GRB.Callback.RUNTIME)
+        if best < GRB.INFINITY:
+            if self.first_incumbent_time is None:
+                self.first_incumbent_time = self._found_time(best, runtime)
+            if self.target_gap_time is None and _gap(best, bound) <= self.target_gap:
+                self.target_gap_time = runtime
+        if where == GRB.Callback.MIPSOL and self.first_incumbent_time is None:
+            # the incumbent best objective does not include this solution yet
+            self.__solutions.append((runtime, model.cbGet(GRB.Callback.MIPSOL_OBJ)))
+
+    def _found_time(self, best: float, runtime: float) -> float:
+        """Return the time the first incumbent (of objective best) was found, runtime
+        if it was not seen in MIPSOL (e.g. a start solution)"""
+
+        for found_time, objective in self.__solutions:
+            if abs(objective - best) <= 1e-9 * max(abs(best), 1):
+                return found_time
+        return runtime
+
+    def finish(self, model):
+        """Complete the record after the optimization, which may have ended before
+        any callback call (e.g. solved by the presolve)"""
+
+        if model.SolCount == 0:
+            return
+        if self.first_incumbent_time is None:
+            self.first_incumbent_time = self._found_time(model.ObjVal, model.Runtime)
+        if self.target_gap_time is None and _gap(model.ObjVal, model.ObjBound) <= (
+            self.target_gap
+        ):
+            self.target_gap_time = model.Runtime
+
+
+def _gap(best: float, bound: float) -> float:
+    return abs(best - bound) / max(abs(best), 1e-10)
@@ -0,0 +1,219 @@
+import pandas as pd
+import numpy as np
+import networkx as nx
+import json
+import time
+
+from pathlib import Path
+from scipy.spatial import cKDTree
+from core.CSRGraph import CSRGraph
+from core.utils import atomic_write, files_hash, verbose_print
+from core.Tracer import record_size, span, traced
+
+# truck speed (km/h) according to the OSM type of the road
+ROAD_SPEEDS = {"primary": 60, "secondary": 45}
+DEFAULT_ROAD_SPEED = 30
+# to be incremented each time the content of the cache files changes
+CACHE_VERSION = 5
+
+
+class RoadNetwork:
+    """This class is used to store the road network of a map, it is built once per map
+    and shared by all the instances (i.e. demand sets) on this map."""
+
+    # networks already loaded in this process, by map hash
+    __NETWORKS = {}
+
+    @classmethod
+    def load(cls, map_path, verbose: bool, use_cache: bool = True):
+        """Return the road network of the map.json file, loaded only once per map"""
+
+        map_hash = files_hash(Path(map_path))
+        if map_hash not in cls.__NETWORKS:
+            cls.__NETWORKS[map_hash] = cls(map_path, map_hash, verbose, use_cache)
+        return cls.__NETWORKS[map_hash]
+
+    @traced("road_network_load")
+    def __init__(self, map_path, map_hash: str, verbose: bool, use_cache: bool = True):
+        self.__MAP_PATH = Path(map_path)
+        self.map_hash = map_hash
+        global vprint
+        vprint = verbose_print(verbose)
+
+        self.__CACHE_PATH = self.__MAP_PATH.parent.joinpath(
+            ".cache", f"map_{map_hash[:16]}_v{CACHE_VERSION}.npz"
+        )
+        if use_cache and self.__CACHE_PATH.exists():
+            self._load_cache()
+        else:
+            with span("json_parse", path=str(self.__MAP_PATH)):
+                self.__brut_df_map = pd.read_json(self.__MAP_PATH)
+            self.gdf_nodes, self.gdf_edges = self._create_gdfs()
+            self.csr_graph = self._create_csr_graph()
+            if use_cache:
+                self._save_cache()
+        self.coordinates = self.csr_graph.coordinates
+        self.tree = cKDTree(self.coordinates)
+        self.__graph = None
+        record_size(
+            "road_graph",
+            self.csr_graph.nbytes,
+            nodes=self.csr_graph.number_of_nodes,
+            edges=self.csr_graph.number_of_edges,
+        )
+
+    def __str__(self) -> str:
+        return f"RoadNetwork: {self.__MAP_PATH}, Nodes: {self.number_of_nodes}"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.gdf_nodes)
+
+    @property
+    def graph(self) -> nx.Graph:
+        """The networkx graph of the road network, only built when needed"""
+
+        if self.__graph is None:
+            self.__graph = self._create_graph()
+        return self.__graph
+
+    @traced("graph_build")
+    def _create_gdfs(self):
+        start_time = time.time()
+        vprint("=================== NODES AND EDGES GDF CREATION ===================")
+        df_map = self.__brut_df_map
+        # dedup the segment extremities in order of first appearance, (lat_min, lon_min)
+        # of a segment being seen before its (lat_max, lon_max)
+        coords = np.empty((2 * len(df_map), 2), dtype=float)
+        coords[0::2, 0] = df_map["lat_min"].to_numpy()
+        coords[0::2, 1] = df_map["lon_min"].to_numpy()
+        coords[1::2, 0] = df_map["lat_max"].to_numpy()
+        coords[1::2, 1] = df_map["lon_max"].to_numpy()
+        uniques, first_seen, inverse = np.unique(
+            coords, axis=0, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first_seen)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        node_ids = rank[inverse.ravel()] + 1
+        gdf_nodes = pd.DataFrame({"lat": uniques[order, 0], "lon": uniques[order, 1]})
+        speed = df_map["type"].map(ROAD_SPEEDS).fillna(DEFAULT_ROAD_SPEED).astype(int)
+        m_per_s_speed = (speed / 3.6).round(2)
+        gdf_edges = pd.DataFrame(
+            {
+                "src": node_ids[0::2],
+                "dest": node_ids[1::2],
+                "length": df_map["length"].to_numpy(),
+                "speed": speed.to_numpy(),
+                "osm_id": df_map["osmid"].to_numpy(),
+                "osm_type": df_map["type"].to_numpy(),
+                "travel_time": (df_map["length"] / m_per_s_speed).to_numpy(),
+            }
+        )
+        end_time = time.time()
+        processing_time = end_time - start_time
+        vprint(gdf_nodes)
+        vprint(gdf_edges)
+        vprint("processing_time:", processing_time)
+        return gdf_nodes, gdf_edges
+
+    def _create_graph(self):
+        vprint("==================== GRAPH CREATION ====================")
+        start_time = time.time()
+        # create empty undirected graph
+        graph = nx.Graph()
+        # add nodes
+        coordinates = zip(self.gdf_nodes["lat"], self.gdf_nodes["lon"])
+        graph.add_nodes_from(
+            (idx + 1, {"coordinates": coord}) for idx, coord in enumerate(coordinates)
+        )
+        # add edges
+        edges_attributes = self.gdf_edges[
+            ["length", "osm_type", "speed", "osm_id", "travel_time"]
+        ].to_dict("records")
+        for idx, attributes in enumerate(edges_attributes):
+            attributes["id"] = idx + 1
+        graph.add_edges_from(
+            zip(
+                self.gdf_edges["src"].tolist(),
+                self.gdf_edges["dest"].tolist(),
+                edges_attributes,
+            )
+        )
+        end_time = time.time()
+        processing_time = end_time - start_time
+        vprint("graph:", graph)
+        vprint("processing_time:", processing_time)
+        return graph
+
+    @traced("csr_graph_build")
+    def _create_csr_graph(self):
+        """Create the array-backed (CSR) travel time graph used by the solvers"""
+
+        return CSRGraph.from_edges(
+            self.gdf_edges["src"].to_numpy(),
+            self.gdf_edges["dest"].to_numpy(),
+            self.gdf_edges["travel_time"].to_numpy(),
+            self.gdf_nodes[["lat", "lon"]].to_numpy(),
+        )
+
+    @traced("cache_save")
+    def _save_cache(self):
+        """Save the preprocessed road network in a binary file next to the map"""
+
+        self.__CACHE_PATH.parent.mkdir(exist_ok=True)
+        # atomic, a concurrent run never reads (nor writes over) a partial file
+        with atomic_write(self.__CACHE_PATH, "wb") as f:
+            np.savez(
+                f,
+                nodes_lat=self.gdf_nodes["lat"].to_numpy(),
+                nodes_lon=self.gdf_nodes["lon"].to_numpy(),
+                edges_src=self.gdf_edges["src"].to_numpy(),
+                edges_dest=self.gdf_edges["dest"].to_numpy(),
+                edges_length=self.gdf_edges["length"].to_numpy(),
+                edges_speed=self.gdf_edges["speed"].to_numpy(),
+                edges_osm_id=np.array(
+                    [json.dumps(osm_id) for osm_id in self.gdf_edges["osm_id"]]
+                ),
+                edges_osm_type=self.gdf_edges["osm_type"].to_numpy(dtype=str),
+                edges_travel_time=self.gdf_edges["travel_time"].to_numpy(),
+                csr_indptr=self.csr_graph.indptr,
+                csr_indices=self.csr_graph.indices,
+                csr_data=self.csr_graph.travel_time,
+            )
+        vprint(f"Cache saved in {self.__CACHE_PATH}")
+
+    @traced("cache_load")
+    def _load_cache(self):
+        """Load the preprocessed road network from its binary cache file"""
+
+        vprint("================== LOAD ROAD NETWORK CACHE ==================")
+        start_time = time.time()
+        with np.load(self.__CACHE_PATH) as cache:
+            self.gdf_nodes = pd.DataFrame(
+                {"lat": cache["nodes_lat"], "lon": cache["nodes_lon"]}
+            )
+            self.gdf_edges = pd.DataFrame(
+                {
+                    "src": cache["edges_src"],
+                    "dest": cache["edges_dest"],
+                    "length": cache["edges_length"],
+                    "speed": cache["edges_speed"],
+                    "osm_id": [json.loads(x) for x in cache["edges_osm_id"]],
+                    "osm_type": cache["edges_osm_type"].astype(object),
+                    "travel_time": cache["edges_travel_time"],
+                }
+            )
+            self.csr_graph = CSRGraph(
+                cache["csr_indptr"],
+                cache["csr_indices"],
+                cache["csr_data"],
+                self.gdf_nodes[["lat", "lon"]].to_numpy(),
+            )
+        end_time = time.time()
+        processing_time = end_time - start_time
+        vprint(f"Cache loaded from {self.__CACHE_PATH}")
+        vprint("processing_time:", processing_time)
@@ -0,0 +1,89 @@
+import numpy as np
+
+# kinds of the events of a route
+MOVE, WAIT, DELIVERY, LOAD = range(4)
+
+ROUTE_DTYPE = np.dtype(
+    [
+        ("kind", np.int8),
+        ("src", np.int32),
+        ("dst", np.int32),
+        ("duration", np.float64),
+        # amount of a delivery, number of the loaded drone, 0 otherwise
+        ("payload", np.int32),
+    ]
+)
+
+
+class Route:
+    """This class is used to store the events of a vehicle route as a structured array
+    of (kind, src, dst, duration, payload), instead of the tuples of the solution dicts:
+    (src, dst, duration) for a move or a wait, (node, node, duration, amount) for a
+    delivery and (node, node, duration, "d1"/"d2") for the loading of a drone."""
+
+    __slots__ = ("events",)
+
+    def __init__(self, events: np.ndarray):
+        self.events = events
+
+    @classmethod
+    def from_moves(cls, moves: list):
+        """Return the route of a list of tuples of a solution dict"""
+
+        events = np.zeros(len(moves), dtype=ROUTE_DTYPE)
+        if not moves:
+            return cls(events)
+        src, dst, duration = zip(*(move[:3] for move in moves))
+        events["src"], events["dst"], events["duration"] = src, dst, duration
+        events["kind"] = np.where(events["src"] != events["dst"], MOVE, WAIT)
+        for i, move in enumerate(moves):
+            if len(move) == 4:
+                if isinstance(move[3], str):
+                    events["kind"][i] = LOAD
+                    events["payload"][i] = int(move[3][1:])
+                else:
+                    events["kind"][i] = DELIVERY
+                    events["payload"][i] = move[3]
+        return cls(events)
+
+    def to_moves(self) -> list:
+        """Return the list of tuples of the route, as in a solution dict"""
+
+        moves = []
+        for kind, src, dst, duration, payload in self.events.tolist():
+            # the integral durations (e.g. of the deliveries and loadings) are given
+            # back as integers, as the solvers write them
+            if duration.is_integer():
+                duration = int(duration)
+            if kind == DELIVERY:
+                moves.append((src, dst, duration, payload))
+            elif kind == LOAD:
+                moves.append((src, dst, duration, f"d{payload}"))
+            else:
+                moves.append((src, dst, duration))
+        return moves
+
+    def __len__(self):
+        return len(self.events)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.events[field]
+
+    @property
+    def nbytes(self) -> int:
+        return self.events.nbytes
+
+    def total_duration(self) -> float:
+        return float(self.events["duration"].sum())
+
+
+def routes_from_solution(solution: dict) -> dict:
+    """Return the routes of a solution dict, by vehicle"""
+
+    return {vehicle: Route.from_moves(moves) for vehicle, moves in solution.items()}
+
+
+def solution_from_routes(routes: dict) -> dict:
+    """Return the solution dict of routes by vehicle"""
+
+    return {vehicle: route.to_moves() for vehicle, route in routes.items()}
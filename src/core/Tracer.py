@@ -0,0 +1,198 @@
+import json
+import os
+import psutil
+import threading
+import time
+import tracemalloc
+
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+
+# returned by the spans of a disabled tracer, does nothing
+_NO_SPAN = nullcontext()
+MB = 1024 * 1024
+
+
+class Tracer:
+    """This class is used to record the nested timing spans of the pipeline stages and
+    to export them as Chrome trace events (chrome://tracing or ui.perfetto.dev).
+    When the tracer is disabled, a span only costs a boolean check.
+    With the memory accounting on, each span also records its RSS delta and the peak
+    of the Python allocations (tracemalloc) made during the span."""
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.events = []
+        self.sizes = {}
+        self.__origin = time.perf_counter_ns()
+        # [rss, traced memory at the start, peak of the children] of the open spans
+        self.__memory_stack = []
+
+    def enable(self, memory: bool = False):
+        """Start recording the spans (the previous ones are dropped), with their memory
+        usage if memory is True (slows down the Python allocations)"""
+
+        self.events = []
+        self.sizes = {}
+        self.__origin = time.perf_counter_ns()
+        self.enabled = True
+        self.memory = memory
+        if memory:
+            self.__process = psutil.Process()
+            self.__memory_stack = []
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.memory:
+            tracemalloc.stop()
+            self.memory = False
+
+    def span(self, name: str, **args):
+        """Return a context manager recording the time spent in its block, spans
+        opened inside the block being its children"""
+
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, args)
+
+    def record_size(self, name: str, nbytes: int = None, **args):
+        """Record the size of a large object built by the pipeline (matrix, graph,
+        model...), nbytes being its size in bytes if known"""
+
+        if self.memory:
+            self.sizes[name] = {"mb": None if nbytes is None else nbytes / MB, **args}
+
+    def _push_memory(self):
+        _, peak = tracemalloc.get_traced_memory()
+        # the peak so far belongs to the parent span
+        if self.__memory_stack:
+            self.__memory_stack[-1][2] = max(self.__memory_stack[-1][2], peak)
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        self.__memory_stack.append([self.__process.memory_info().rss, current, 0])
+
+    def _pop_memory(self) -> dict:
+        rss, current, children_peak = self.__memory_stack.pop()
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, children_peak)
+        if self.__memory_stack:
+            self.__memory_stack[-1][2] = max(self.__memory_stack[-1][2], peak)
+        return {
+            "rss_delta_mb": (self.__process.memory_info().rss - rss) / MB,
+            "peak_mb": (peak - current) / MB,
+        }
+
+    def memory_report(self) -> dict:
+        """Return the memory usage of the recorded spans and the recorded object sizes"""
+
+        stages = [
+            {"name": event["name"], **event["args"]}
+            for event in sorted(self.events, key=lambda event: event["ts"])
+            if "peak_mb" in event["args"]
+        ]
+        return {"stages": stages, "objects": self.sizes}
+
+    def _record(self, name: str, start: int, end: int, args: dict):
+        self.events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.__origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def export(self, path):
+        """Write the recorded spans in a Chrome trace event JSON file"""
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+class PeakRSS:
+    """Context manager giving the peak RSS (MB) of the process during its block,
+    sampled by a background thread every interval seconds (a shorter peak may be
+    missed)"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_mb = None
+
+    def __enter__(self):
+        self.__process = psutil.Process()
+        self.__peak = self.__process.memory_info().rss
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self._sample, daemon=True)
+        self.__thread.start()
+        return self
+
+    def _sample(self):
+        while not self.__stop.wait(self.interval):
+            self.__peak = max(self.__peak, self.__process.memory_info().rss)
+
+    def __exit__(self, *_):
+        self.__stop.set()
+        self.__thread.join()
+        self.__peak = max(self.__peak, self.__process.memory_info().rss)
+        self.peak_mb = self.__peak / MB
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        if self.tracer.memory:
+            self.tracer._push_memory()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        if self.tracer.memory:
+            self.args = {**self.args, **self.tracer._pop_memory()}
+        self.tracer._record(self.name, self.start, end, self.args)
+        return False
+
+
+# tracer of the process, every stage of the pipeline reports to it
+TRACER = Tracer()
+
+
+def span(name: str, **args):
+    """Return a span of the process tracer"""
+
+    return TRACER.span(name, **args)
+
+
+def record_size(name: str, nbytes: int = None, **args):
+    """Record the size of a large object in the process tracer"""
+
+    TRACER.record_size(name, nbytes, **args)
+
+
+def traced(name: str):
+    """Decorator recording each call of the function as a span of the process tracer"""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            with TRACER.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,38 +1,78 @@
 import pandas as pd
-import geopandas as gpd
 import numpy as np
 import networkx as nx
-import folium
 import time
 
 from pathlib import Path
-from scipy.spatial import cKDTree
-from geopy.distance import geodesic
-from core.utils import verbose_print
+from core.CSRGraph import ContractedGraph, walk_predecessors
+from core.RoadNetwork import CACHE_VERSION, RoadNetwork
+from core.utils import (
+    atomic_write,
+    files_hash,
+    geodesic_distance,
+    save_html_map,
+    verbose_print,
+)
+from core.Tracer import record_size, span, traced
 
 
 class VRPWDData:
     """This class is used to store the instance information of the VRPWD problem."""
 
-    def __init__(self, instance_dir: str, case: int, verbose: bool):
+    @traced("instance_load")
+    def __init__(
+        self,
+        instance_dir: str,
+        case: int,
+        verbose: bool,
+        full_drone_matrix: bool = False,
+        drone_speed: float = 50,
+        use_cache: bool = True,
+    ):
         self.__MAP_PATH = Path(instance_dir).joinpath("map.json")
         self.__DEMANDS_PATH = Path(instance_dir).joinpath("demands.json")
 
         self._INSTANCE_NAME = instance_dir.split("/")[-1]
         self._CASE = case
         self._VERBOSE = verbose
+        self.__FULL_DRONE_MATRIX = full_drone_matrix
+        self.__DRONE_SPEED = drone_speed
         global vprint
         vprint = verbose_print(self._VERBOSE)
 
-        self.__brut_df_map = pd.read_json(self.__MAP_PATH)
-        self.__brut_df_demands = pd.read_json(self.__DEMANDS_PATH)
-        self.__gdf_nodes, self.__gdf_edges = self._create_gdfs()
+        # the road network is shared by all the instances on the same map
+        self.network = RoadNetwork.load(self.__MAP_PATH, verbose, use_cache)
+        self.csr_graph = self.network.csr_graph
 
-        self.graph = self._create_graph()
-        self.dpd_time_matrix = self._create_dpd_time_matrix()
+        # content hash of the instance
+        self.instance_hash = files_hash(self.network.map_hash, self.__DEMANDS_PATH)
+        cache_key = files_hash(self.instance_hash, f"{CACHE_VERSION}")[:16]
+        self.__CACHE_PATH = Path(instance_dir).joinpath(".cache", cache_key + ".npz")
+        # the drone matrix is only built (or loaded) on its first use, in its own
+        # cache file since it also depends on the drone parameters
+        drone_key = files_hash(
+            self.instance_hash,
+            f"{drone_speed}-{full_drone_matrix}-{CACHE_VERSION}",
+        )[:16]
+        self.__DRONE_CACHE_PATH = self.__CACHE_PATH.with_name(f"drone_{drone_key}.npz")
+        self.__USE_CACHE = use_cache
+        self.__drone_nodes = None
+        self.__drone_time_matrix = None
+        # directory of the caches of the solvers, None if the cache is off
+        self.cache_dir = self.__CACHE_PATH.parent if use_cache else None
 
-        if self._CASE > 0:  # vrp with drones
-            self.drone_time_matrix = self._create_drone_time_matrix(drone_speed=50)
+        if use_cache and self.__CACHE_PATH.exists():
+            self._load_cache()
+        else:
+            with span("json_parse", path=str(self.__DEMANDS_PATH)):
+                self.__brut_df_demands = pd.read_json(self.__DEMANDS_PATH)
+            self._locate_demands()
+            self.dpd_time_matrix = self._create_dpd_time_matrix()
+            if use_cache:
+                self._save_cache()
+        # row of each dpd node in the dpd matrix and in the predecessors array
+        self.__dpd_index = {node: i for i, node in enumerate(self.dpd_nodes)}
+        self.record_sizes()
 
     def __str__(self) -> str:
         return f"Instance: {self._INSTANCE_NAME}, Case: {self._CASE}"
@@ -40,124 +80,39 @@ class VRPWDData:
     def __repr__(self) -> str:
         return self.__str__()
 
-    def _create_gdfs(self):
-        start_time = time.time()
-        vprint("=================== NODES AND EDGES GDF CREATION ===================")
-        coords_dict = {}
-        rows_gdf_nodes = []
-        cols_gdf_nodes = ["lat", "lon", "demand"]
-        rows_gdf_edges = []
-        cols_gdf_edges = [
-            "src",
-            "dest",
-            "length",
-            "speed",
-            "osm_id",
-            "osm_type",
-            "travel_time",
-        ]
-        for _, row in self.__brut_df_map.iterrows():
-            if (row["lat_min"], row["lon_min"]) not in coords_dict:
-                coords_dict[(row["lat_min"], row["lon_min"])] = len(coords_dict) + 1
-            idx_src = coords_dict[(row["lat_min"], row["lon_min"])]
-            if (row["lat_max"], row["lon_max"]) not in coords_dict:
-                coords_dict[(row["lat_max"], row["lon_max"])] = len(coords_dict) + 1
-            idx_dest = coords_dict[(row["lat_max"], row["lon_max"])]
-            length = row["length"]
-            osm_id = row["osmid"]
-            osm_type = row["type"]
-            if osm_type == "primary":
-                speed = 60
-            elif osm_type == "secondary":
-                speed = 45
-            else:
-                speed = 30
-            m_per_s_speed = round(speed / 3.6, 2)
-            travel_time = length / m_per_s_speed
-            rows_gdf_edges.append(
-                {
-                    "src": idx_src,
-                    "dest": idx_dest,
-                    "length": length,
-                    "speed": speed,
-                    "osm_id": osm_id,
-                    "osm_type": osm_type,
-                    "travel_time": travel_time,
-                }
-            )
-        for coord, _ in coords_dict.items():
-            x = coord[0]
-            y = coord[1]
-            rows_gdf_nodes.append({"lat": x, "lon": y, "demand": 0})
-        gdf_nodes = gpd.GeoDataFrame(rows_gdf_nodes, columns=cols_gdf_nodes)
-        gdf_edges = gpd.GeoDataFrame(rows_gdf_edges, columns=cols_gdf_edges)
-        end_time = time.time()
-        processing_time = end_time - start_time
-        vprint(gdf_nodes)
-        vprint(gdf_edges)
-        vprint("processing_time:", processing_time)
-        return gdf_nodes, gdf_edges
+    @property
+    def graph(self) -> nx.Graph:
+        """The networkx graph of the road network (shared with the other instances)"""
+
+        return self.network.graph
+
+    @traced("kdtree_snap")
+    def _locate_demands(self):
+        """Snap the demands and the deposit to their nearest node of the road graph,
+        summing the amounts of the demands snapped to the same node"""
 
-    def _create_graph(self):
-        vprint("==================== GRAPH CREATION ====================")
+        vprint("==================== LOCATE DEMANDS ====================")
         start_time = time.time()
-        # create empty undirected graph
-        graph = nx.Graph()
-        # add nodes
-        for idx, row in self.__gdf_nodes.iterrows():
-            lat = row["lat"]
-            lon = row["lon"]
-            coord = (lat, lon)
-            d = row["demand"]
-            graph.add_node(idx + 1, coordinates=coord, deposit=False, demand=d)
-        # add edges
-        for idx, row in self.__gdf_edges.iterrows():
-            src = row["src"]
-            dest = row["dest"]
-            length = row["length"]
-            speed = row["speed"]
-            osm_type = row["osm_type"]
-            osm_id = row["osm_id"]
-            travel_time = row["travel_time"]
-            graph.add_edge(
-                src,
-                dest,
-                id=idx + 1,
-                length=length,
-                osm_type=osm_type,
-                speed=speed,
-                osm_id=osm_id,
-                travel_time=travel_time,
-            )
-        # Build K-D Tree
-        coords = self.__gdf_nodes[["lat", "lon"]].to_numpy()
-        tree = cKDTree(coords)
-        # add demand
-        for _, row in self.__brut_df_demands.iterrows():
-            point = (row["lat"], row["lon"])
-            demand = row["amount"]
-            # Find nearest node with K-D Tree
-            _, nearest_node = tree.query(point)
-            nearest_node = nearest_node + 1
-            # update the demand in the graph
-            graph.nodes[nearest_node].update({"demand": demand})
-            # in the df
-            self.__gdf_nodes.loc[nearest_node, "demand"] = demand
-        # add deposit
+        df_demands = self.__brut_df_demands
+        # snap the demands and the deposit in one query of the K-D Tree (deposit last)
         _deposit_gps = (44.8500102, 0.5370699)
-        # Find nearest node with K-D Tree
-        _, nearest_node = tree.query(_deposit_gps)
-        nearest_node = nearest_node + 1
+        points = np.vstack((df_demands[["lat", "lon"]].to_numpy(), [_deposit_gps]))
+        _, nearest_nodes = self.network.tree.query(points)
+        # the amounts of the demands snapped to the same node are summed
+        amounts = np.zeros(self.network.number_of_nodes)
+        np.add.at(amounts, nearest_nodes[:-1], df_demands["amount"].to_numpy())
+        demands_nodes = np.unique(nearest_nodes[:-1])
+        self.demands = dict(
+            zip((demands_nodes + 1).tolist(), amounts[demands_nodes].tolist())
+        )
         # update the deposit in the Data object
-        self.deposit = nearest_node
-        # in the graph
-        graph.nodes[self.deposit].update({"deposit": True})
+        self.deposit = int(nearest_nodes[-1]) + 1
         end_time = time.time()
         processing_time = end_time - start_time
-        vprint("graph:", graph)
+        vprint("demands:", self.demands)
         vprint("processing_time:", processing_time)
-        return graph
 
+    @traced("dijkstra_matrix")
     def _create_dpd_time_matrix(self):
         """Create the D+1xD+1 travel time matrix from the road point of view
         with D the number of demand nodes, +1 for the deposit.
@@ -165,99 +120,265 @@ class VRPWDData:
 
         vprint("================== CREATE TIME MATRIX ==================")
         start_time = time.time()
-        demands_nodes = [
-            node for node in self.graph.nodes() if self.graph.nodes[node]["demand"] > 0
-        ]
+        demands_nodes = [node for node, d in self.demands.items() if d > 0]
         vprint("deposit:", self.deposit)
         # add deposit to the list of demand_nodes in order to calculate travel_time between demand nodes and deposit
         # add it at the beginning of the list
         demands_nodes.insert(0, self.deposit)
         self.dpd_nodes = demands_nodes
         vprint("dpd_nodes:", self.dpd_nodes)
-        # create empty matrix
-        matrix = np.zeros(shape=(len(demands_nodes), len(demands_nodes)), dtype=float)
-        vprint("matrix_shape:", matrix.shape)
-        # pre-compute shortest paths
-        shortest_paths = dict(
-            nx.all_pairs_dijkstra_path_length(self.graph, weight="travel_time")
+        # the chains of degree-2 nodes are merged before searching, the dpd nodes kept
+        self.contracted_graph = self.csr_graph.contract(keep=self.dpd_nodes)
+        vprint("contracted_graph:", self.contracted_graph)
+        # one single source dijkstra per dpd node instead of all pairs, the shortest
+        # path trees are kept to rebuild the road paths without any new search
+        contracted_dpd_nodes = self.contracted_graph.index[demands_nodes]
+        dpd_indices = contracted_dpd_nodes - 1
+        shortest_paths, predecessors = self.contracted_graph.shortest_path_tree(
+            contracted_dpd_nodes
         )
-        # fill matrix using list comprehension
-        matrix[np.arange(len(demands_nodes)), np.arange(len(demands_nodes))] = 0
-        for i in range(len(demands_nodes)):
-            for j in range(i + 1, len(demands_nodes)):
-                matrix[i][j] = matrix[j][i] = round(
-                    shortest_paths[demands_nodes[i]][demands_nodes[j]], 3
-                )
+        self.dpd_predecessors = predecessors.astype(np.int32)
+        # keep the upper triangle to get an exactly symmetric matrix
+        matrix = np.triu(np.round(shortest_paths[:, dpd_indices], 3), k=1)
+        matrix = matrix + matrix.T
+        vprint("matrix_shape:", matrix.shape)
         end_time = time.time()
         processing_time = end_time - start_time
         vprint("processing_time:", processing_time)
         vprint("matrix:", matrix)
         return matrix
 
+    def record_sizes(self):
+        """Record the sizes of the matrices and graphs of the instance in the tracer"""
+
+        record_size(
+            "contracted_graph",
+            self.contracted_graph.nbytes,
+            nodes=self.contracted_graph.number_of_nodes,
+            edges=self.contracted_graph.number_of_edges,
+        )
+        record_size(
+            "dpd_time_matrix",
+            self.dpd_time_matrix.nbytes,
+            shape=self.dpd_time_matrix.shape,
+        )
+        record_size(
+            "dpd_predecessors",
+            self.dpd_predecessors.nbytes,
+            shape=self.dpd_predecessors.shape,
+        )
+        if self.__drone_time_matrix is not None:
+            record_size(
+                "drone_time_matrix",
+                self.__drone_time_matrix.nbytes,
+                shape=self.__drone_time_matrix.shape,
+            )
+
+    def road_path(self, src: int, dest: int) -> list:
+        """Return the shortest road path from src to dest as a list of nodes, walked back
+        from the shortest path trees when src or dest is a dpd node"""
+
+        graph = self.contracted_graph
+        contracted_src, contracted_dest = graph.index[src], graph.index[dest]
+        if src in self.__dpd_index and contracted_dest > 0:
+            path = walk_predecessors(
+                self.dpd_predecessors[self.__dpd_index[src]],
+                contracted_src,
+                contracted_dest,
+            )
+            return graph.expand(path)
+        if dest in self.__dpd_index and contracted_src > 0:
+            # the road graph is undirected
+            path = walk_predecessors(
+                self.dpd_predecessors[self.__dpd_index[dest]],
+                contracted_dest,
+                contracted_src,
+            )
+            return graph.expand(path[::-1])
+        return self.csr_graph.shortest_path(src, dest)
+
+    def road_moves(self, src: int, dest: int) -> list:
+        """Return the truck moves (a, b, travel_time) along the shortest road path
+        from src to dest"""
+
+        path = self.road_path(src, dest)
+        times = self.csr_graph.edge_times(path[:-1], path[1:]).tolist()
+        return list(zip(path[:-1], path[1:], times))
+
+    def _get_drone_nodes(self):
+        """Return the nodes between which a drone can fly: the deposit, the demand nodes
+        and their neighbors on the road graph (i.e. the launch/rendezvous candidates)"""
+
+        if self.__FULL_DRONE_MATRIX:
+            return np.arange(1, self.network.number_of_nodes + 1)
+        drone_nodes = set(self.dpd_nodes)
+        for node in self.dpd_nodes[1:]:
+            drone_nodes.update(self.csr_graph.neighbors(node))
+        return np.array(sorted(drone_nodes))
+
+    @traced("drone_matrix")
     def _create_drone_time_matrix(self, drone_speed):
-        """Create the time travel matrix from the drone point of view"""
+        """Create the time travel matrix from the drone point of view, restricted to the
+        drone nodes (row/column i of the matrix being the node drone_nodes[i])"""
 
         vprint("================ CREATE DRONE MATRIX ================")
         start_time = time.time()
-        number_of_nodes = self.graph.number_of_nodes()
-        matrix = np.zeros(shape=(number_of_nodes, number_of_nodes), dtype=float)
+        m_per_s_drone_speed = drone_speed / 3.6
+        self._set_drone_nodes(self._get_drone_nodes())
+        coords = self.network.coordinates[self.__drone_nodes - 1]
+        matrix = np.empty(shape=(len(self.__drone_nodes), len(self.__drone_nodes)))
         vprint("matrix_shape:", matrix.shape)
-        coordinates = {
-            node: (
-                self.graph.nodes[node]["coordinates"][1],
-                self.graph.nodes[node]["coordinates"][0],
+        # by blocks of rows to bound the memory used by the temporary arrays
+        block_size = 256
+        for i in range(0, len(self.__drone_nodes), block_size):
+            block = coords[i : i + block_size]
+            dist = geodesic_distance(
+                block[:, None, 0], block[:, None, 1], coords[:, 0], coords[:, 1]
             )
-            for node in self.graph.nodes
-        }
-        nodes = list(self.graph.nodes)
-        for i in range(number_of_nodes):
-            current_node = nodes[i]
-            current_node_coord = coordinates[current_node]
-            for j in range(i + 1, number_of_nodes):
-                other_node = nodes[j]
-                other_node_coord = coordinates[other_node]
-                dist = geodesic(current_node_coord, other_node_coord).m
-                m_per_s_drone_speed = drone_speed / 3.6
-                travel_time = round(dist / m_per_s_drone_speed, 3)
-                matrix[current_node - 1][other_node - 1] = travel_time
-                matrix[other_node - 1][current_node - 1] = travel_time
+            matrix[i : i + block_size] = np.round(dist / m_per_s_drone_speed, 3)
         end_time = time.time()
         processing_time = end_time - start_time
         vprint("processing_time:", processing_time)
         vprint("matrix:", matrix)
         return matrix
 
+    def _set_drone_nodes(self, drone_nodes):
+        self.__drone_nodes = drone_nodes
+        self.__drone_index = np.full(self.network.number_of_nodes + 1, -1)
+        self.__drone_index[drone_nodes] = np.arange(len(drone_nodes))
+
+    def _build_drone_matrix(self):
+        """Load the drone matrix from its cache file, or create (and save) it"""
+
+        if self.__USE_CACHE and self.__DRONE_CACHE_PATH.exists():
+            self._load_drone_cache()
+        else:
+            self.__drone_time_matrix = self._create_drone_time_matrix(
+                self.__DRONE_SPEED
+            )
+            if self.__USE_CACHE:
+                self._save_drone_cache()
+        record_size(
+            "drone_time_matrix",
+            self.__drone_time_matrix.nbytes,
+            shape=self.__drone_time_matrix.shape,
+        )
+
+    @property
+    def drone_nodes(self):
+        """The nodes between which a drone can fly, built on first use"""
+
+        if self.__drone_nodes is None:
+            self._build_drone_matrix()
+        return self.__drone_nodes
+
+    @property
+    def drone_time_matrix(self):
+        """The drone time matrix of the drone nodes, built on first use (the case 0
+        never uses it)"""
+
+        if self.__drone_time_matrix is None:
+            self._build_drone_matrix()
+        return self.__drone_time_matrix
+
+    def drone_time(self, src: int, dest: int) -> float:
+        """Return the drone travel time between the nodes src and dest of the graph"""
+
+        if self.__drone_time_matrix is None:
+            self._build_drone_matrix()
+        i, j = self.__drone_index[src], self.__drone_index[dest]
+        if i >= 0 and j >= 0:
+            return self.drone_time_matrix[i, j]
+        # not a drone node: computed on the fly
+        src_lat, src_lon = self.network.coordinates[src - 1]
+        dest_lat, dest_lon = self.network.coordinates[dest - 1]
+        dist = geodesic_distance(src_lat, src_lon, dest_lat, dest_lon)
+        return round(float(dist) / (self.__DRONE_SPEED / 3.6), 3)
+
+    def drone_times(self, src, dest):
+        """Return the drone travel times between the nodes src[k] and dest[k]"""
+
+        src_coords = self.network.coordinates[np.asarray(src) - 1]
+        dest_coords = self.network.coordinates[np.asarray(dest) - 1]
+        dist = geodesic_distance(
+            src_coords[:, 0], src_coords[:, 1], dest_coords[:, 0], dest_coords[:, 1]
+        )
+        return np.round(dist / (self.__DRONE_SPEED / 3.6), 3)
+
+    @traced("cache_save")
+    def _save_cache(self):
+        """Save the preprocessed instance in a binary file next to the instance"""
+
+        self.__CACHE_PATH.parent.mkdir(exist_ok=True)
+        # atomic, a concurrent run never reads (nor writes over) a partial file
+        with atomic_write(self.__CACHE_PATH, "wb") as f:
+            np.savez(
+                f,
+                demands_nodes=list(self.demands.keys()),
+                demands_amounts=list(self.demands.values()),
+                deposit=self.deposit,
+                dpd_nodes=self.dpd_nodes,
+                dpd_time_matrix=self.dpd_time_matrix,
+                dpd_predecessors=self.dpd_predecessors,
+                **{
+                    f"contracted_{name}": array
+                    for name, array in self.contracted_graph.arrays().items()
+                },
+            )
+        vprint(f"Cache saved in {self.__CACHE_PATH}")
+
+    @traced("cache_load")
+    def _load_cache(self):
+        """Load the preprocessed instance from its binary cache file"""
+
+        vprint("====================== LOAD CACHE ======================")
+        start_time = time.time()
+        with np.load(self.__CACHE_PATH) as cache:
+            self.demands = dict(
+                zip(cache["demands_nodes"].tolist(), cache["demands_amounts"].tolist())
+            )
+            self.deposit = int(cache["deposit"])
+            self.dpd_nodes = cache["dpd_nodes"].tolist()
+            self.dpd_time_matrix = cache["dpd_time_matrix"]
+            self.dpd_predecessors = cache["dpd_predecessors"]
+            self.contracted_graph = ContractedGraph.from_arrays(
+                **{
+                    name[len("contracted_") :]: cache[name]
+                    for name in cache.files
+                    if name.startswith("contracted_")
+                }
+            )
+        end_time = time.time()
+        processing_time = end_time - start_time
+        vprint(f"Cache loaded from {self.__CACHE_PATH}")
+        vprint("processing_time:", processing_time)
+
+    @traced("cache_save")
+    def _save_drone_cache(self):
+        """Save the drone matrix in its binary file next to the instance"""
+
+        self.__DRONE_CACHE_PATH.parent.mkdir(exist_ok=True)
+        with atomic_write(self.__DRONE_CACHE_PATH, "wb") as f:
+            np.savez(
+                f,
+                drone_nodes=self.__drone_nodes,
+                drone_time_matrix=self.__drone_time_matrix,
+            )
+        vprint(f"Cache saved in {self.__DRONE_CACHE_PATH}")
+
+    @traced("cache_load")
+    def _load_drone_cache(self):
+        """Load the drone matrix from its binary cache file"""
+
+        with np.load(self.__DRONE_CACHE_PATH) as cache:
+            self._set_drone_nodes(cache["drone_nodes"])
+            self.__drone_time_matrix = cache["drone_time_matrix"]
+        vprint(f"Cache loaded from {self.__DRONE_CACHE_PATH}")
+
+    @traced("html")
     def save_map_html(self):
         """Plot the nodes on an interactive html map"""
 
-        # Create map
-        m = folium.Map(location=[44.838633, 0.540983], zoom_start=13)
-        # Add points to the map according to the demand
-        for node in self.graph.nodes():
-            coord = self.graph.nodes[node]["coordinates"]
-            if self.graph.nodes[node]["deposit"]:
-                folium.Marker(
-                    coord,
-                    popup="Deposit",
-                    icon=folium.Icon(color="green"),
-                    tooltip=f"{node}",
-                ).add_to(m)
-            elif self.graph.nodes[node]["demand"] > 0:
-                # add the demand value as a popup
-                folium.Marker(
-                    coord,
-                    popup=f"Demand: {int(self.graph.nodes[node]['demand'])}",
-                    icon=folium.Icon(color="red"),
-                    tooltip=f"{node}",
-                ).add_to(m)
-            else:
-                folium.Marker(
-                    coord,
-                    icon=folium.Icon(color="blue"),
-                    tooltip=f"{node}",
-                ).add_to(m)
-        # save the map in a html file
-        _assets_path = "assets/" + self._INSTANCE_NAME
-        Path(_assets_path).mkdir(parents=True, exist_ok=True)
-        m.save(_assets_path + "/map.html")
-        print(f"HTML Map saved in {_assets_path}/map.html")
+        _map_path = Path("assets", self._INSTANCE_NAME, "map.html")
+        save_html_map(_map_path, self.network.coordinates, self.deposit, self.demands)
+        print(f"HTML Map saved in {_map_path}")
@@ -0,0 +1,164 @@
+import numpy as np
+
+from core.Route import DELIVERY, LOAD, MOVE, Route
+from core.VRPWDData import VRPWDData
+
+# tolerance on the travel times, the solutions round them to 3 decimals
+TIME_TOLERANCE = 1e-3
+
+
+class VRPWDValidator:
+    """This class is used to check the routes (dict of the truck and drone_<k> Route)
+    of a solution of an instance: the truck events and the drone trips are
+    replayed on a single clock, each violation (coverage, quantity, continuity, travel
+    times, launch/recovery timing) being reported, in O(M log M) for M events."""
+
+    def __init__(self, instance: VRPWDData):
+        self.instance = instance
+        self.demands = {
+            node: int(demand) for node, demand in instance.demands.items() if demand > 0
+        }
+
+    def validate(self, routes: dict) -> list:
+        """Return the list of the violations of the routes (empty if they are valid)"""
+
+        violations = []
+        truck = routes["truck"]
+        if len(truck) == 0:
+            return ["coverage: the truck tour is empty"]
+        delivered = {}
+        ends = self._replay_truck(truck, delivered, violations)
+        # the drones with a route and the ones loaded by the truck
+        drones = {int(name[6:]) for name in routes if name.startswith("drone_")}
+        drones.update(truck["payload"][truck["kind"] == LOAD].tolist())
+        for drone in sorted(drones):
+            self._replay_drone(
+                drone,
+                routes.get(f"drone_{drone}", Route.from_moves([])),
+                truck,
+                ends,
+                delivered,
+                violations,
+            )
+        # coverage and quantities
+        for node, demand in self.demands.items():
+            if delivered.get(node, 0) != demand:
+                violations.append(
+                    f"quantity: node {node} receives {delivered.get(node, 0)} of its {demand} packages"
+                )
+        for node in delivered.keys() - self.demands.keys():
+            violations.append(
+                f"quantity: {delivered[node]} packages delivered to node {node} without demand"
+            )
+        return violations
+
+    def _replay_truck(self, truck: Route, delivered: dict, violations: list):
+        """Replay the truck events, return their end times"""
+
+        deposit = self.instance.deposit
+        src, dst, duration = truck["src"], truck["dst"], truck["duration"]
+        if src[0] != deposit:
+            violations.append("continuity: the tour does not start at the deposit")
+        if dst[-1] != deposit:
+            violations.append("continuity: the tour does not end at the deposit")
+        for i in np.flatnonzero(src[1:] != dst[:-1]) + 1:
+            violations.append(
+                f"continuity: event {i} starts at {src[i]} instead of {dst[i - 1]}"
+            )
+        for i in np.flatnonzero(duration < 0):
+            violations.append(f"time: event {i} has a negative duration")
+        deliveries = truck["kind"] == DELIVERY
+        for node, amount in zip(
+            src[deliveries].tolist(), truck["payload"][deliveries].tolist()
+        ):
+            delivered[node] = delivered.get(node, 0) + amount
+
+        # the moves must follow the roads, not faster than their travel time
+        moves = np.flatnonzero(truck["kind"] == MOVE)
+        road_times = self.instance.csr_graph.edge_times(src[moves], dst[moves])
+        for i in moves[np.isinf(road_times)]:
+            violations.append(
+                f"continuity: move {i} from {src[i]} to {dst[i]} does not follow a road"
+            )
+        too_fast = duration[moves] < road_times - TIME_TOLERANCE
+        for i in moves[too_fast & np.isfinite(road_times)]:
+            violations.append(
+                f"time: move {i} from {src[i]} to {dst[i]} is faster than its road"
+            )
+
+        return np.cumsum(duration)
+
+    def _replay_drone(
+        self,
+        drone: int,
+        route: Route,
+        truck: Route,
+        ends,
+        delivered: dict,
+        violations: list,
+    ):
+        """Replay the trips (go and back moves) of a drone from its launches by the
+        truck, each trip having to be recovered before its next loading starts"""
+
+        is_load = (truck["kind"] == LOAD) & (truck["payload"] == drone)
+        loads = np.flatnonzero(is_load)
+        if self.instance._CASE == 0 and (len(route) or len(loads)):
+            violations.append(f"drone: drone {drone} is used in case 0")
+        if len(route) % 2 != 0:
+            violations.append(f"drone: drone {drone} has an unfinished trip")
+        go, back = route.events[0:-1:2], route.events[1::2]
+        if len(go) != len(loads):
+            violations.append(
+                f"drone: drone {drone} has {len(go)} trips for {len(loads)} launches"
+            )
+        trips = min(len(go), len(loads))
+        go, back, loads = go[:trips], back[:trips], loads[:trips]
+        if trips == 0:
+            return
+
+        for k in np.flatnonzero(go["src"] != truck["src"][loads]):
+            violations.append(
+                f"launch: drone {drone} trip {k} starts at {go['src'][k]}, the truck is at {truck['src'][loads[k]]}"
+            )
+        for k in np.flatnonzero(back["src"] != go["dst"]):
+            violations.append(
+                f"drone: drone {drone} trip {k} goes to {go['dst'][k]} but comes back from {back['src'][k]}"
+            )
+        for moves in (go, back):
+            drone_times = self.instance.drone_times(moves["src"], moves["dst"])
+            for k in np.flatnonzero(moves["duration"] < drone_times - TIME_TOLERANCE):
+                violations.append(
+                    f"time: drone {drone} trip {k} from {moves['src'][k]} to {moves['dst'][k]} is faster than the drone"
+                )
+        for node in go["dst"].tolist():
+            delivered[node] = delivered.get(node, 0) + 1
+
+        # the drone takes off at the end of its loading and is recovered the first
+        # time the truck ends an event (but its own loadings) on the rendezvous node
+        # after its arrival, which must happen before its next loading starts
+        horizon = ends[-1]
+        recoveries = np.sort(
+            _node_time_keys(truck["dst"][~is_load], ends[~is_load], horizon)
+        )
+        launches = ends[loads]
+        arrivals = launches + go["duration"] + back["duration"]
+        next_loadings = launches[1:] - truck["duration"][loads[1:]]
+        deadlines = np.append(next_loadings, horizon)
+        pos = np.searchsorted(
+            recoveries,
+            _node_time_keys(back["dst"], arrivals - TIME_TOLERANCE, horizon),
+        )
+        limits = _node_time_keys(back["dst"], deadlines + TIME_TOLERANCE, horizon)
+        recovered = pos < len(recoveries)
+        recovered[recovered] = recoveries[pos[recovered]] <= limits[recovered]
+        for k in np.flatnonzero(~recovered):
+            violations.append(
+                f"recovery: drone {drone} trip {k} arriving at {back['dst'][k]} at {arrivals[k]:.3f} is not recovered in time"
+            )
+
+
+def _node_time_keys(nodes, times, horizon: float):
+    """Return keys ordering the (node, time) pairs by node then by time, for times
+    within [-1, horizon + 1)"""
+
+    return nodes * (horizon + 2.0) + times
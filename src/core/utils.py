@@ -1,4 +1,11 @@
+import hashlib
+import numpy as np
+import os
 import psutil
+import threading
+
+from contextlib import contextmanager
+from pathlib import Path
 
 
 def verbose_print(verbose: bool):
@@ -13,4 +20,175 @@ def verbose_print(verbose: bool):
 
 
 def available_cpu_count():
-    return psutil.cpu_count(logical=False)
+    # the number of physical cores is unknown (None) on some platforms
+    return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+
+
+@contextmanager
+def atomic_write(path, mode: str = "w", **kwargs):
+    """Open a temporary file of this process and thread next to path, moved onto path
+    once written: a reader never sees a partial file and concurrent writers of the
+    same path do not mix their content (the last one wins)"""
+
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+# WGS-84 ellipsoid, the one used by geopy.distance.geodesic
+_WGS84_A = 6378137.0
+_WGS84_F = 1 / 298.257223563
+_WGS84_B = (1 - _WGS84_F) * _WGS84_A
+
+
+def geodesic_distance(lat1, lon1, lat2, lon2, max_iter: int = 100):
+    """Vectorized geodesic distance (in meters) on the WGS-84 ellipsoid.
+
+    The arguments are broadcast together as NumPy arrays (in degrees) and the
+    Vincenty inverse formula is iterated on the whole array at once. On the
+    shipped instances it matches geopy.distance.geodesic (Karney) within 1e-6 m.
+    The formula does not converge for nearly antipodal points, whose distances are
+    given by the geodesic of geographiclib (Karney) instead."""
+
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+        *(np.asarray(c, dtype=float) for c in (lat1, lon1, lat2, lon2))
+    )
+    phi1, lambda1, phi2, lambda2 = (np.radians(c) for c in (lat1, lon1, lat2, lon2))
+    L = lambda2 - lambda1
+    U1 = np.arctan((1 - _WGS84_F) * np.tan(phi1))
+    U2 = np.arctan((1 - _WGS84_F) * np.tan(phi2))
+    sin_U1, cos_U1 = np.sin(U1), np.cos(U1)
+    sin_U2, cos_U2 = np.sin(U2), np.cos(U2)
+    lambda_ = L
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            sin_lambda, cos_lambda = np.sin(lambda_), np.cos(lambda_)
+            sin_sigma = np.hypot(
+                cos_U2 * sin_lambda, cos_U1 * sin_U2 - sin_U1 * cos_U2 * cos_lambda
+            )
+            cos_sigma = sin_U1 * sin_U2 + cos_U1 * cos_U2 * cos_lambda
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(
+                sin_sigma == 0, 0.0, cos_U1 * cos_U2 * sin_lambda / sin_sigma
+            )
+            cos2_alpha = 1 - sin_alpha**2
+            # equatorial lines: cos2_alpha == 0
+            cos_2sigma_m = np.where(
+                cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_U1 * sin_U2 / cos2_alpha
+            )
+            C = _WGS84_F / 16 * cos2_alpha * (4 + _WGS84_F * (4 - 3 * cos2_alpha))
+            previous_lambda = lambda_
+            lambda_ = L + (1 - C) * _WGS84_F * sin_alpha * (
+                sigma
+                + C
+                * sin_sigma
+                * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+            )
+            converged = np.abs(lambda_ - previous_lambda) < 1e-12
+            if np.all(converged):
+                break
+    u2 = cos2_alpha * (_WGS84_A**2 - _WGS84_B**2) / _WGS84_B**2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = (
+        B
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + B
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                - B
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2sigma_m**2)
+            )
+        )
+    )
+    distance = _WGS84_B * A * (sigma - delta_sigma)
+    # nearly antipodal points: no convergence or a longitude difference over pi
+    failed = ~converged | (np.abs(lambda_) > np.pi)
+    if np.any(failed):
+        # slow to import, only loaded for these rare points
+        from geographiclib.geodesic import Geodesic
+
+        distance = np.array(distance)
+        for i in map(tuple, np.argwhere(failed)):
+            distance[i] = Geodesic.WGS84.Inverse(lat1[i], lon1[i], lat2[i], lon2[i])[
+                "s12"
+            ]
+    return distance
+
+
+def files_hash(*items) -> str:
+    """SHA-256 hex digest of the content of the given files (paths) or strings"""
+
+    sha = hashlib.sha256()
+    for item in items:
+        if isinstance(item, Path):
+            item = hashlib.sha256(item.read_bytes()).hexdigest()
+        sha.update(item.encode() + b"\0")
+    return sha.hexdigest()
+
+
+def save_html_map(path, coordinates, deposit: int, demands: dict, routes: dict = None):
+    """Save an interactive html map with one GeoJSON layer per kind of feature: the
+    road nodes (clustered), the deposit and demand nodes, and one layer per route of
+    the routes dict (name -> list of moves (src, dest, ...)), coordinates being the
+    (lat, lon) array of the road nodes"""
+
+    # slow to import, only loaded when a map is requested
+    import folium
+    from folium.plugins import FastMarkerCluster
+
+    lon_lat = coordinates[:, ::-1].tolist()
+    m = folium.Map(location=coordinates[deposit - 1].tolist(), zoom_start=13)
+    FastMarkerCluster(coordinates.tolist(), name="road nodes").add_to(m)
+    # deposit and demand nodes
+    nodes = [(deposit, 0, "green")] + [
+        (node, demand, "red") for node, demand in demands.items() if demand > 0
+    ]
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": lon_lat[node - 1]},
+            "properties": {"node": node, "demand": demand, "color": color},
+        }
+        for node, demand, color in nodes
+    ]
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        name="demand nodes",
+        marker=folium.CircleMarker(radius=6, fill=True, fill_opacity=1),
+        style_function=lambda feature: {"color": feature["properties"]["color"]},
+        tooltip=folium.GeoJsonTooltip(fields=["node", "demand"]),
+    ).add_to(m)
+    # one multi line per route
+    route_colors = {"truck": "black", "drone_1": "green", "drone_2": "yellow"}
+    for name, moves in (routes or {}).items():
+        lines = [
+            [lon_lat[move[0] - 1], lon_lat[move[1] - 1]]
+            for move in moves
+            if move[0] != move[1]
+        ]
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "MultiLineString", "coordinates": lines},
+            "properties": {"name": name},
+        }
+        color = route_colors.get(name, "blue")
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": [feature]},
+            name=name,
+            style_function=lambda _, color=color: {"color": color, "weight": 2},
+        ).add_to(m)
+    folium.LayerControl().add_to(m)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    m.save(str(path))
@@ -0,0 +1,191 @@
+import argparse
+import json
+import numpy as np
+
+from pathlib import Path
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+from core.utils import geodesic_distance
+
+# the deposit of VRPWDData, the generated maps are centered on it
+DEPOSIT_GPS = (44.8500102, 0.5370699)
+# meters per degree of latitude
+M_PER_DEGREE = 111320
+# one line of the grid out of ARTERIAL_PERIOD is a primary road
+ARTERIAL_PERIOD = 5
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic VRPWD instances (map.json and demands.json) "
+        "on a grid-like road network, one instance directory per number of demands"
+    )
+    parser.add_argument("output", help="directory of the generated instances")
+    parser.add_argument(
+        "-n", "--nodes", type=int, default=400, help="number of road nodes"
+    )
+    parser.add_argument(
+        "-d",
+        "--demands",
+        nargs="+",
+        type=int,
+        default=[20],
+        help="numbers of demand nodes, the smaller demand sets being subsets of the "
+        "larger ones (instance directories <output>/instance_<nodes>_<demands>)",
+    )
+    parser.add_argument(
+        "-a",
+        "--amounts",
+        nargs="+",
+        type=int,
+        default=[1, 2],
+        help="possible amounts of a demand (default: 1 2)",
+    )
+    parser.add_argument(
+        "-p",
+        "--probabilities",
+        nargs="+",
+        type=float,
+        help="probabilities of the amounts (default: uniform)",
+    )
+    parser.add_argument(
+        "--spacing",
+        type=float,
+        default=150,
+        help="distance between two neighbor nodes of the grid in meters",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0,
+        help="random displacement of the nodes, as a fraction of the spacing",
+    )
+    parser.add_argument(
+        "--drop",
+        type=float,
+        default=0,
+        help="fraction of the roads removed (the network stays connected)",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    return parser.parse_args()
+
+
+def generate_map(nodes: int, spacing: float, jitter: float, drop: float, rng):
+    """Return the (lat, lon) coordinates of the road nodes and the (src, dest, type)
+    arrays of the roads of a (perturbed) grid of nodes, filled row by row"""
+
+    side = int(np.ceil(np.sqrt(nodes)))
+    rows, cols = np.divmod(np.arange(nodes), side)
+    # positions in meters around the deposit
+    y = (rows - rows.max() / 2 + jitter * rng.uniform(-0.5, 0.5, nodes)) * spacing
+    x = (cols - (side - 1) / 2 + jitter * rng.uniform(-0.5, 0.5, nodes)) * spacing
+    lat = DEPOSIT_GPS[0] + y / M_PER_DEGREE
+    lon = DEPOSIT_GPS[1] + x / (M_PER_DEGREE * np.cos(np.radians(DEPOSIT_GPS[0])))
+    coordinates = np.column_stack((lat, lon))
+
+    # horizontal roads then vertical roads
+    horizontal = np.flatnonzero((cols < side - 1) & (np.arange(nodes) + 1 < nodes))
+    vertical = np.flatnonzero(np.arange(nodes) + side < nodes)
+    src = np.concatenate((horizontal, vertical))
+    dest = np.concatenate((horizontal + 1, vertical + side))
+    line = np.concatenate((rows[horizontal], cols[vertical]))
+    road_type = np.where(line % ARTERIAL_PERIOD == 0, "primary", "residential")
+
+    if drop > 0:
+        # keep a random spanning tree so that the network stays connected
+        weights = coo_matrix(
+            (rng.uniform(1, 2, len(src)), (src, dest)), shape=(nodes, nodes)
+        )
+        tree = minimum_spanning_tree(weights).tocoo()
+        keys = src.astype(np.int64) * nodes + dest
+        in_tree = np.isin(keys, tree.row.astype(np.int64) * nodes + tree.col)
+        candidates = np.flatnonzero(~in_tree)
+        size = min(len(candidates), round(drop * len(src)))
+        kept = np.ones(len(src), dtype=bool)
+        kept[rng.choice(candidates, size=size, replace=False)] = False
+        src, dest, road_type = src[kept], dest[kept], road_type[kept]
+    return coordinates, src, dest, road_type
+
+
+def generate_demands(coordinates, demands: int, amounts, probabilities, rng):
+    """Return the (lat, lon, amount) of the demands, on distinct road nodes taken in a
+    random order (the first k demands of a seed being the same for any size)"""
+
+    if demands > len(coordinates) - 1:
+        raise ValueError(f"Cannot place {demands} demands on {len(coordinates)} nodes")
+    order = rng.permutation(len(coordinates))
+    # not on the node of the deposit
+    deposit = np.argmin(np.sum((coordinates - DEPOSIT_GPS) ** 2, axis=1))
+    order = order[order != deposit][:demands]
+    amount = rng.choice(amounts, size=len(coordinates), p=probabilities)
+    return coordinates[order], amount[order]
+
+
+def write_instance(instance_dir: Path, coordinates, src, dest, road_type, demands):
+    """Write the map.json and demands.json files of an instance"""
+
+    instance_dir.mkdir(parents=True, exist_ok=True)
+    length = geodesic_distance(
+        coordinates[src, 0],
+        coordinates[src, 1],
+        coordinates[dest, 0],
+        coordinates[dest, 1],
+    )
+    roads = [
+        {
+            "command_number": 0,
+            "id": i + 1,
+            "lat_max": lat_max,
+            "lat_min": lat_min,
+            "length": road_length,
+            "lon_max": lon_max,
+            "lon_min": lon_min,
+            "oneway": 1,
+            "osmid": i + 1,
+            "type": road,
+        }
+        for i, (lat_min, lon_min, lat_max, lon_max, road_length, road) in enumerate(
+            zip(
+                coordinates[src, 0].tolist(),
+                coordinates[src, 1].tolist(),
+                coordinates[dest, 0].tolist(),
+                coordinates[dest, 1].tolist(),
+                np.round(length, 3).tolist(),
+                road_type.tolist(),
+            )
+        )
+    ]
+    with open(instance_dir.joinpath("map.json"), "w") as f:
+        json.dump(roads, f, indent=4)
+    demand_points, demand_amounts = demands
+    demands = [
+        {"lat": lat, "lon": lon, "amount": amount}
+        for (lat, lon), amount in zip(demand_points.tolist(), demand_amounts.tolist())
+    ]
+    with open(instance_dir.joinpath("demands.json"), "w") as f:
+        json.dump(demands, f, indent=4)
+    print(f"Instance written in {instance_dir}")
+
+
+def main():
+    args = parse_arguments()
+    rng = np.random.default_rng(args.seed)
+    coordinates, src, dest, road_type = generate_map(
+        args.nodes, args.spacing, args.jitter, args.drop, rng
+    )
+    demand_points, demand_amounts = generate_demands(
+        coordinates, max(args.demands), args.amounts, args.probabilities, rng
+    )
+    for demands in sorted(args.demands):
+        write_instance(
+            Path(args.output, f"instance_{args.nodes}_{demands}"),
+            coordinates,
+            src,
+            dest,
+            road_type,
+            (demand_points[:demands], demand_amounts[:demands]),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import subprocess
+import sys
+import time
+
+from pathlib import Path
+
+SOLVER_PATH = Path(__file__).resolve().parent.joinpath("vrpwdSolver.py")
+# modules which must not be imported before a method needing them is selected
+HEAVY_MODULES = ("gurobipy", "folium", "matplotlib", "shapely", "geopandas")
+# (case, method) whose selection must not import any of the heavy modules
+LIGHT_METHOD = (0, "heuristic")
+
+
+def print_usage():
+    print("Usage: python3 startupCheck.py [budget] [repeats]")
+    print("Where:")
+    print("[budget] is the maximum median startup time in seconds (default 0.5)")
+    print("[repeats] is the number of measured startups (default 5)")
+    print("Example: python3 startupCheck.py 0.5 5")
+
+
+def measure_startup(repeats: int) -> float:
+    """Return the median wall time of 'vrpwdSolver.py --help' in a new process"""
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(SOLVER_PATH), "--help"],
+            stdout=subprocess.DEVNULL,
+            check=False,
+        )
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def imported_heavy_modules() -> list:
+    """Return the heavy modules imported by the solver and the light method"""
+
+    code = (
+        "import sys, vrpwdSolver;"
+        f"vrpwdSolver.load_method{LIGHT_METHOD};"
+        f"print(' '.join(m for m in {HEAVY_MODULES} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SOLVER_PATH.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return output.stdout.split()
+
+
+def main():
+    if "-h" in sys.argv or "--help" in sys.argv or len(sys.argv) > 3:
+        print_usage()
+        sys.exit(1)
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    ok = True
+    startup_time = measure_startup(repeats)
+    print(f"Startup: median={startup_time:.3f}sec; budget={budget:.3f}sec")
+    if startup_time > budget:
+        print("Error: the startup time is over budget")
+        ok = False
+    heavy_modules = imported_heavy_modules()
+    if heavy_modules:
+        print(f"Error: {LIGHT_METHOD} imports {', '.join(heavy_modules)}")
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
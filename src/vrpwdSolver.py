@@ -1,14 +1,51 @@
 import sys
+import importlib
 
-from core.VRPWDData import VRPWDData
-from algorithms.tsp.TSPGreedy import TSPGreedy
-from algorithms.tsp.TSPMIPModel import TSPMIPModel
-from algorithms.vrp.VRPWDReducedMIPModel_1 import VRPWDReducedMIPModel_1
-from algorithms.vrp.VRPWDHeuristic_1 import VRPWDHeuristic_1
-from algorithms.vrp.VRPWDHeuristic_2 import VRPWDHeuristic_2
-from algorithms.vrp.VRPWDPathHeuristic_2 import VRPWDPathHeuristic_2
+from pathlib import Path
+from core.Tracer import TRACER, span
 from core.utils import verbose_print
 
+# solver of each (case, method), its module is only imported when it is selected:
+# (module, class, extra arguments of the constructor, has a gap)
+METHODS = {
+    (0, "heuristic"): ("algorithms.tsp.TSPGreedy", "TSPGreedy", (), False),
+    (0, "mip"): ("algorithms.tsp.TSPMIPModel", "TSPMIPModel", (), True),
+    (0, "multistart"): ("algorithms.tsp.TSPMultiStart", "TSPMultiStart", (), False),
+    (1, "mip"): (
+        "algorithms.vrp.VRPWDReducedMIPModel_1",
+        "VRPWDReducedMIPModel_1",
+        (),
+        True,
+    ),
+    (1, "heuristic"): (
+        "algorithms.vrp.VRPWDHeuristic_1",
+        "VRPWDHeuristic_1",
+        (),
+        False,
+    ),
+    (2, "heuristic"): (
+        "algorithms.vrp.VRPWDHeuristic_2",
+        "VRPWDHeuristic_2",
+        (2, "drone_inter"),
+        False,
+    ),
+    (2, "pathheuristic"): (
+        "algorithms.vrp.VRPWDPathHeuristic_2",
+        "VRPWDPathHeuristic_2",
+        (),
+        False,
+    ),
+}
+METHOD_ALIASES = {"h": "heuristic", "ph": "pathheuristic", "ms": "multistart"}
+
+
+def load_method(case: int, method: str):
+    """Import the solver class of the method for the case"""
+
+    module_name, class_name, args, has_gap = METHODS[case, method]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name), args, has_gap
+
 
 def print_usage():
     print("Usage: python3 vrpwdSolver.py <instance_directory> <case> <method>")
@@ -19,6 +56,7 @@ def print_usage():
     print("\tFor case 0:")
     print("\t\theuristic (h for short)")
     print("\t\tmip")
+    print("\t\tmultistart (ms for short, parallel on all the cores)")
     print("\tFor case 1:")
     print("\t\theuristic (h for short)")
     print("\t\tmip")
@@ -31,16 +69,30 @@ def print_usage():
         "-v or --verbose is an optional argument to print all the information of the execution"
     )
     print("-g or --graphic is an optional argument to plot the solution graph")
+    print(
+        "--png or --svg is an optional argument to save the solution graph plot in a file (without display)"
+    )
+    print("--html is an optional argument to save the instance and solution html maps")
+    print(
+        "--memory is an optional argument to record the memory usage of each stage and write it next to the solution"
+    )
+    print(
+        "--trace is an optional argument to save the timing spans of the run in a Chrome trace file (log/)"
+    )
+    print(
+        "--no-cache is an optional argument to ignore the preprocessed instance cache"
+    )
+    print(
+        "--warm-start <solution_file> is an optional argument to start from a solution saved by a previous run (*_solution.npz)"
+    )
+    print(
+        "--tsp-tour <solution_file> is an optional argument to use the truck tour of a saved solution (*_solution.npz) as the TSP tour of the drone heuristics instead of solving it"
+    )
     print("Example: python3 vrpwdSolver.py data/instance_1/ 0 mip -v -g")
 
 
 def main():
-    if (
-        len(sys.argv) < 4
-        or len(sys.argv) > 6
-        or ("-h" in sys.argv)
-        or ("--help" in sys.argv)
-    ):
+    if len(sys.argv) < 4 or ("-h" in sys.argv) or ("--help" in sys.argv):
         print_usage()
         sys.exit(1)
 
@@ -59,10 +111,12 @@ def main():
         and method != "h"
         and method != "pathheuristic"
         and method != "ph"
+        and method != "multistart"
+        and method != "ms"
         and method != "mip"
     ):
         print(
-            "Method should be heuristic (h for short), pathheuristic (ph for short) or mip!"
+            "Method should be heuristic (h for short), pathheuristic (ph for short), multistart (ms for short) or mip!"
         )
         print("Please use -h or --help to see the usage")
         sys.exit(1)
@@ -80,82 +134,81 @@ def main():
     if "-g" in sys.argv or "--graphic" in sys.argv:
         plot = True
 
-    data = VRPWDData(instance_dir, case, verbose)
-    data.save_map_html()
-
-    if case == 0:
-        if method == "heuristic" or method == "h":
-            solution = TSPGreedy(data).solve()
-            if solution.check():
-                print(
-                    f"Result: runtime={solution.runtime:.2f}sec; objective={solution.objective_value:.2f}sec"
-                )
-                solution.write()
-                solution.save_sol_html()
-                if plot:
-                    solution.plot()
-
-        if method == "mip":
-            solution = TSPMIPModel(data).solve()
-            if solution.check():
-                print(
-                    f"Result: runtime={solution.runtime:.2f}sec; objective={solution.objective_value:.2f}sec; gap={solution.gap:.4f}%"
-                )
-                solution.write()
-                solution.save_sol_html()
-                if plot:
-                    solution.plot()
-
-    elif case == 1:
-        if method == "mip":
-            solution = VRPWDReducedMIPModel_1(data).solve()
-            if solution.check():
-                print(
-                    f"Result: runtime={solution.runtime:.2f}sec; objective={solution.objective_value:.2f}sec; gap={solution.gap:.4f}%"
-                )
-                solution.write()
-                solution.save_sol_html()
-                if plot:
-                    solution.plot()
-
-        if method == "heuristic" or method == "h":
-            solution = VRPWDHeuristic_1(data).solve()
-            if solution.check():
-                print(
-                    f"Result: runtime={solution.runtime:.2f}sec; objective={solution.objective_value:.2f}sec"
-                )
-                solution.write()
-                solution.save_sol_html()
-                if plot:
-                    solution.plot()
-    elif case == 2:
-        if method == "heuristic" or method == "h":
-            solution = VRPWDHeuristic_2(data, 2, "drone_inter").solve()
-            if solution.check():
-                print(
-                    f"Result: runtime={solution.runtime:.2f}sec; objective={solution.objective_value:.2f}sec"
-                )
-                solution.write()
-                solution.save_sol_html()
-            if plot:
-                solution.plot()
-        if method == "pathheuristic" or method == "ph":
-            solution = VRPWDPathHeuristic_2(data).solve()
-            if solution.check():
-                print(
-                    f"Result: runtime={solution.runtime:.2f}sec; objective={solution.objective_value:.2f}sec"
-                )
-                solution.write()
-                solution.save_sol_html()
-                if plot:
-                    solution.plot()
-    elif case == 3:
+    use_cache = "--no-cache" not in sys.argv
+    html = "--html" in sys.argv
+    plot_extensions = [ext for ext in ("png", "svg") if f"--{ext}" in sys.argv]
+    trace = "--trace" in sys.argv
+    memory = "--memory" in sys.argv
+    warm_start_path = None
+    if "--warm-start" in sys.argv:
+        warm_start_index = sys.argv.index("--warm-start") + 1
+        if warm_start_index >= len(sys.argv):
+            print("--warm-start should be followed by a solution file!")
+            print("Please use -h or --help to see the usage")
+            sys.exit(1)
+        warm_start_path = sys.argv[warm_start_index]
+    tsp_tour_path = None
+    if "--tsp-tour" in sys.argv:
+        tsp_tour_index = sys.argv.index("--tsp-tour") + 1
+        if tsp_tour_index >= len(sys.argv):
+            print("--tsp-tour should be followed by a solution file!")
+            print("Please use -h or --help to see the usage")
+            sys.exit(1)
+        tsp_tour_path = sys.argv[tsp_tour_index]
+
+    method = METHOD_ALIASES.get(method, method)
+    if case == 3:
         print("Case 3 is not implemented yet!")
         # TODO: implement case 3 (c.f. branch dev)
-    else:
-        print("Case should be a number in (0, 1, 2, 3)!")
+        return
+    if (case, method) not in METHODS:
+        print(f"Method {method} is not available for case {case}!")
         print("Please use -h or --help to see the usage")
         sys.exit(1)
+    solver, args, has_gap = load_method(case, method)
+
+    from core.VRPWDData import VRPWDData
+
+    if trace or memory:
+        TRACER.enable(memory=memory)
+    data = VRPWDData(instance_dir, case, verbose, use_cache=use_cache)
+    if html:
+        data.save_map_html()
+    warm_start = None
+    if warm_start_path is not None:
+        from core.VRPWDSolution import VRPWDSolution
+
+        warm_start = VRPWDSolution.load(data, warm_start_path, verbose)
+    if tsp_tour_path is not None:
+        from core.VRPWDSolution import VRPWDSolution
+        from algorithms.tsp.TSPTourCache import TSPTourCache
+
+        tsp_tour = VRPWDSolution.load(data, tsp_tour_path, verbose)
+        TSPTourCache.inject(data, tsp_tour.truck_stops())
+
+    with span("solve", method=method):
+        solution = solver(data, *args, warm_start=warm_start).solve()
+    if solution.check():
+        result = f"Result: runtime={solution.runtime:.2f}sec; objective={solution.objective_value:.2f}sec"
+        if has_gap:
+            result += f"; gap={solution.gap:.4f}%"
+        print(result)
+        solution.write()
+        solution.save()
+        if memory:
+            solution.write_memory_report(TRACER.memory_report())
+        if html:
+            solution.save_sol_html()
+        for extension in plot_extensions:
+            solution.save_plot(extension)
+        if plot:
+            solution.plot()
+    if trace:
+        trace_path = Path(
+            "log", f"trace_{data._INSTANCE_NAME}_case_{case}_{method}.json"
+        )
+        TRACER.export(trace_path)
+        print(f"Trace saved in {trace_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+import argparse
+import contextlib
+import io
+
+from itertools import product
+from pathlib import Path
+from benchmark import find_instances, write_results
+from core.VRPWDData import VRPWDData
+from core.utils import available_cpu_count
+from algorithms.tsp.TSPGreedy import TSPGreedy
+from algorithms.tsp.TSPMIPModel import TSPMIPModel
+from algorithms.vrp.VRPWDReducedMIPModel_1 import VRPWDReducedMIPModel_1
+from algorithms.vrp.VRPWDPathHeuristic_2 import VRPWDPathHeuristic_2
+
+# MIP model of each case
+MODELS = {0: "TSPMIPModel", 1: "VRPWDReducedMIPModel_1", 2: "VRPWDPathHeuristic_2"}
+# columns of the result table
+FIELDS = [
+    "instance",
+    "case",
+    "model",
+    "start",
+    "repeat",
+    "first_incumbent_time",
+    "target_gap_time",
+    "runtime",
+    "objective",
+    "gap",
+    "error",
+]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Compare the MIP models solved from scratch (cold) and from the "
+        "greedy tour (warm): time to the first incumbent and to the target gap"
+    )
+    parser.add_argument(
+        "instances",
+        nargs="+",
+        help="instance directories, or directories containing instance directories",
+    )
+    parser.add_argument(
+        "-c", "--cases", nargs="+", type=int, default=[0, 1, 2], help="cases to solve"
+    )
+    parser.add_argument(
+        "-g",
+        "--target-gap",
+        type=float,
+        default=0.01,
+        help="relative gap whose time is recorded (default: 0.01)",
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=1, help="number of runs of each cell"
+    )
+    parser.add_argument(
+        "-t",
+        "--time-limit",
+        type=int,
+        default=600,
+        help="time limit of each solve in seconds (default: 600)",
+    )
+    parser.add_argument(
+        "-j",
+        "--threads",
+        type=int,
+        default=available_cpu_count(),
+        help="number of Gurobi threads (default: number of physical cores)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="log/warm_start",
+        help="path of the result tables, without extension (default: log/warm_start)",
+    )
+    return parser.parse_args()
+
+
+def run(
+    data: VRPWDData,
+    warm: bool,
+    target_gap: float,
+    time_limit: int,
+    threads: int,
+) -> dict:
+    """Solve the MIP model of the case of the instance, started from the greedy tour
+    if warm, and return its row of the result table"""
+
+    row = dict.fromkeys(FIELDS)
+    row.update(case=data._CASE, model=MODELS[data._CASE])
+    row.update(start="warm" if warm else "cold")
+    try:
+        # the solvers print their progress, only the table is of interest here
+        with contextlib.redirect_stdout(io.StringIO()):
+            if data._CASE == 2:
+                # the same tour gives the same paths model, started from the greedy
+                # selection of the paths if warm
+                model = VRPWDPathHeuristic_2(data)
+                solve_args = {"greedy_start": warm}
+            else:
+                # the greedy tour is not part of the measured times
+                warm_start = TSPGreedy(data).solve() if warm else None
+                if data._CASE == 0:
+                    model = TSPMIPModel(data)
+                else:
+                    model = VRPWDReducedMIPModel_1(data)
+                solve_args = {"warm_start": warm_start}
+            model.progress.target_gap = target_gap
+            solution = model.solve(
+                time_limit=time_limit, nb_threads=threads, **solve_args
+            )
+        row["first_incumbent_time"] = model.progress.first_incumbent_time
+        row["target_gap_time"] = model.progress.target_gap_time
+        row["runtime"] = solution.runtime
+        row["objective"] = solution.objective_value
+        row["gap"] = solution.gap
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def main():
+    args = parse_arguments()
+    instances = find_instances(args.instances)
+    cases = [case for case in args.cases if case in MODELS]
+    if not instances or not cases:
+        print("Error: no instance or no case with a MIP model to solve")
+        return
+
+    print("Warm Start Campaign:")
+    print(f"Instances: {len(instances)}; Cases: {cases}; Repeats: {args.repeats}")
+    rows = []
+    # the runs are sequential, the Gurobi times of concurrent runs would not compare
+    for instance, case in product(instances, cases):
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = VRPWDData(instance, case, False)
+        for repeat, warm in product(range(args.repeats), (False, True)):
+            row = run(data, warm, args.target_gap, args.time_limit, args.threads)
+            row.update(instance=Path(instance).name, repeat=repeat)
+            rows.append(row)
+            status = row["error"] or (
+                f"first_incumbent={_seconds(row['first_incumbent_time'])} "
+                f"target_gap={_seconds(row['target_gap_time'])} "
+                f"runtime={row['runtime']:.2f}sec objective={row['objective']}"
+            )
+            print(
+                f"{row['instance']} case={case} start={row['start']} "
+                f"repeat={repeat}: {status}"
+            )
+    write_results(rows, args.output, FIELDS)
+
+
+def _seconds(value: float) -> str:
+    return "none" if value is None else f"{value:.2f}sec"
+
+
+if __name__ == "__main__":
+    main()
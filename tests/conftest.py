@@ -0,0 +1,19 @@
+import pytest
+import shutil
+import sys
+
+from pathlib import Path
+
+# the modules of src/ are imported as top-level modules (core, algorithms...)
+SRC_DIR = Path(__file__).resolve().parent.parent.joinpath("src")
+DATA_DIR = SRC_DIR.parent.joinpath("data")
+sys.path.insert(0, str(SRC_DIR))
+
+
+@pytest.fixture
+def instance_dir(tmp_path):
+    """A copy of the instance 1, its cache files being written in the copy"""
+
+    path = tmp_path / "instance_1"
+    shutil.copytree(DATA_DIR / "instance_1", path)
+    return path
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from core.CSRGraph import ContractedGraph, CSRGraph
+
+
+def chain_graph() -> CSRGraph:
+    """Return the graph 7-1-2-3-4-5 with the leaves 8 on 1 and 6 on 4, i.e. the chain
+    1-2-3-4 of degree-2 nodes 2 and 3"""
+
+    src = [1, 2, 3, 4, 4, 1, 1]
+    dest = [2, 3, 4, 5, 6, 7, 8]
+    times = [1.0, 2.0, 3.0, 1.0, 1.0, 1.0, 1.0]
+    return CSRGraph.from_edges(src, dest, times, np.arange(16.0).reshape(8, 2))
+
+
+def ring_graph(n: int = 40, seed: int = 0) -> CSRGraph:
+    """Return a ring of n nodes with a few random chords"""
+
+    rng = np.random.default_rng(seed)
+    src = list(range(1, n + 1)) + [1, 10, 20]
+    dest = list(range(2, n + 1)) + [1] + [25, 33, 5]
+    times = rng.uniform(1, 10, len(src))
+    return CSRGraph.from_edges(src, dest, times, rng.uniform(size=(n, 2)))
+
+
+def test_chain_is_collapsed():
+    contracted = chain_graph().contract()
+    assert contracted.nodes.tolist() == [1, 4, 5, 6, 7, 8]
+    assert contracted.chains[1, 4] == [2, 3]
+    assert contracted.chains[4, 1] == [3, 2]
+    assert contracted.index[[1, 2, 3, 4]].tolist() == [1, 0, 0, 2]
+    assert contracted.edge_time(1, 2) == 6.0
+    assert (
+        contracted.coordinates.tolist()
+        == chain_graph().coordinates[contracted.nodes - 1].tolist()
+    )
+
+
+def test_kept_nodes_are_not_collapsed():
+    contracted = chain_graph().contract(keep=[3])
+    assert contracted.nodes.tolist() == [1, 3, 4, 5, 6, 7, 8]
+    assert contracted.chains[1, 3] == [2]
+    assert (3, 4) not in contracted.chains
+    assert contracted.edge_time(1, 2) == 3.0
+
+
+def test_expand():
+    contracted = chain_graph().contract()
+    index = contracted.index
+    path = [index[7], index[1], index[4], index[6]]
+    assert contracted.expand(path) == [7, 1, 2, 3, 4, 6]
+    assert contracted.expand(path[::-1]) == [6, 4, 3, 2, 1, 7]
+
+
+def test_shortest_paths_are_preserved():
+    graph = ring_graph()
+    contracted = graph.contract(keep=[3, 17])
+    nodes = contracted.nodes.tolist()
+    assert {3, 17} <= set(nodes) and len(nodes) < graph.number_of_nodes
+    for u in nodes:
+        for v in nodes:
+            expected = graph.shortest_path_length(u, v)
+            src, dest = contracted.index[u], contracted.index[v]
+            assert contracted.shortest_path_length(src, dest) == pytest.approx(expected)
+            path = contracted.expand(contracted.shortest_path(src, dest))
+            assert path[0] == u and path[-1] == v
+            assert graph.path_length(path) == pytest.approx(expected)
+
+
+def test_arrays_round_trip():
+    contracted = ring_graph().contract(keep=[3, 17])
+    loaded = ContractedGraph.from_arrays(**contracted.arrays())
+    assert loaded.chains == contracted.chains
+    assert loaded.nodes.tolist() == contracted.nodes.tolist()
+    assert loaded.index.tolist() == contracted.index.tolist()
+    for name in ("indptr", "indices", "travel_time", "coordinates"):
+        assert np.array_equal(getattr(loaded, name), getattr(contracted, name))
@@ -0,0 +1,90 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from core.CSRGraph import CSRGraph, walk_predecessors
+
+
+def random_graph(n: int = 60, m: int = 150, seed: int = 0):
+    """Return a random connected weighted graph as a networkx graph and a CSRGraph"""
+
+    rng = np.random.default_rng(seed)
+    # a random spanning tree then random extra edges
+    src = [int(rng.integers(1, i)) for i in range(2, n + 1)]
+    dest = list(range(2, n + 1))
+    src += rng.integers(1, n + 1, m).tolist()
+    dest += rng.integers(1, n + 1, m).tolist()
+    times = np.round(rng.uniform(1, 100, len(src)), 3)
+    graph = nx.Graph()
+    graph.add_nodes_from(range(1, n + 1))
+    for u, v, t in zip(src, dest, times.tolist()):
+        if u != v:
+            graph.add_edge(u, v, travel_time=t)
+    return graph, CSRGraph.from_edges(src, dest, times, rng.uniform(size=(n, 2)))
+
+
+def test_from_edges_keeps_networkx_semantics():
+    # self-loop dropped, the last of the parallel edges (1, 2) wins
+    graph = CSRGraph.from_edges(
+        [1, 2, 2, 3, 1], [2, 2, 3, 1, 2], [5.0, 1.0, 2.0, 3.0, 4.0], np.zeros((3, 2))
+    )
+    assert graph.number_of_nodes == 3
+    assert graph.number_of_edges == 3
+    assert graph.edge_time(1, 2) == graph.edge_time(2, 1) == 4.0
+    assert graph.neighbors(1).tolist() == [2, 3]
+    assert graph.neighbors(2).tolist() == [1, 3]
+
+
+def test_edge_times():
+    nx_graph, graph = random_graph()
+    edges = list(nx_graph.edges(data="travel_time"))
+    src = [u for u, _, _ in edges]
+    dest = [v for _, v, _ in edges]
+    expected = [t for _, _, t in edges]
+    assert graph.edge_times(src, dest).tolist() == expected
+    assert graph.edge_times(dest, src).tolist() == expected
+    missing = next(
+        (u, v) for u in nx_graph for v in nx_graph if u != v and v not in nx_graph[u]
+    )
+    assert graph.edge_time(*missing) == np.inf
+
+
+def test_neighbors_and_edge_rows():
+    nx_graph, graph = random_graph()
+    for node in nx_graph:
+        neighbors = graph.neighbors(node).tolist()
+        assert neighbors == sorted(nx_graph[node])
+        assert graph.edge_row(node) == [
+            nx_graph[node][v]["travel_time"] for v in neighbors
+        ]
+
+
+def test_shortest_paths_match_networkx():
+    nx_graph, graph = random_graph()
+    lengths = dict(nx.all_pairs_dijkstra_path_length(nx_graph, weight="travel_time"))
+    for src in (1, 7, 30):
+        for dest in (2, 15, 60):
+            expected = lengths[src][dest]
+            assert graph.shortest_path_length(src, dest) == pytest.approx(expected)
+            path = graph.shortest_path(src, dest)
+            assert path[0] == src and path[-1] == dest
+            assert graph.path_length(path) == pytest.approx(expected)
+
+
+def test_shortest_path_avoiding_a_node():
+    nx_graph, graph = random_graph()
+    excluded = 5
+    nx_graph.remove_node(excluded)
+    expected = nx.dijkstra_path_length(nx_graph, 1, 60, weight="travel_time")
+    assert graph.shortest_path_length(1, 60, excluded) == pytest.approx(expected)
+    assert excluded not in graph.shortest_path(1, 60, excluded)
+
+
+def test_walk_predecessors_without_path():
+    # two components: {1, 2} and {3, 4}
+    graph = CSRGraph.from_edges([1, 3], [2, 4], [1.0, 1.0], np.zeros((4, 2)))
+    _, predecessors = graph.shortest_path_tree([1])
+    assert walk_predecessors(predecessors[0], 1, 2) == [1, 2]
+    assert graph.shortest_path_length(1, 4) == np.inf
+    with pytest.raises(ValueError):
+        walk_predecessors(predecessors[0], 1, 4)
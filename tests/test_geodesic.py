@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from geographiclib.geodesic import Geodesic
+from core.utils import geodesic_distance
+
+# quarter of a meridian and of the equator of WGS-84, in meters
+QUARTER_MERIDIAN = 10001965.729
+QUARTER_EQUATOR = 10018754.171
+
+
+@pytest.mark.parametrize(
+    "points, distance",
+    [
+        # Flinders Peak -> Buninyong, the example of Vincenty's paper
+        (
+            (-37.95103342, 144.42486789, -37.65282114, 143.92649554),
+            54972.271,
+        ),
+        ((0, 0, 90, 0), QUARTER_MERIDIAN),
+        ((0, 0, 0, 90), QUARTER_EQUATOR),
+        ((90, 0, -90, 0), 2 * QUARTER_MERIDIAN),
+    ],
+)
+def test_known_distances(points, distance):
+    assert geodesic_distance(*points) == pytest.approx(distance, abs=1e-3)
+
+
+@pytest.mark.parametrize(
+    "points",
+    [
+        (0, 0, 0, 0),
+        (44.8500102, 0.5370699, 44.8500102, 0.5370699),
+        (90, 0, 90, 45),
+    ],
+)
+def test_coincident_points(points):
+    assert geodesic_distance(*points) == pytest.approx(0, abs=1e-6)
+
+
+@pytest.mark.parametrize(
+    "points",
+    [
+        (0, 0, 0, 180),
+        (30, 0, -30, 180),
+        (0, 0, 0, 179.7),
+        (0, 0, 0.5, 179.5),
+        (10, 20, -10, -160.2),
+    ],
+)
+def test_nearly_antipodal_points(points):
+    # where the Vincenty iteration does not converge
+    expected = Geodesic.WGS84.Inverse(*points)["s12"]
+    assert geodesic_distance(*points) == pytest.approx(expected, abs=1e-6)
+
+
+def test_vectorized():
+    rng = np.random.default_rng(0)
+    # points around the deposit, with an antipodal pair and a coincident one
+    lat = np.append(44.85 + rng.uniform(-0.1, 0.1, 50), [0, 44.85])
+    lon = np.append(0.54 + rng.uniform(-0.1, 0.1, 50), [0, 0.54])
+    lat2, lon2 = lat[::-1].copy(), lon[::-1].copy()
+    lat2[-2:], lon2[-2:] = [0, 44.85], [180, 0.54]
+    distances = geodesic_distance(lat, lon, lat2, lon2)
+    assert distances.shape == lat.shape
+    expected = [
+        Geodesic.WGS84.Inverse(*points)["s12"]
+        for points in zip(lat.tolist(), lon.tolist(), lat2.tolist(), lon2.tolist())
+    ]
+    assert distances == pytest.approx(expected, abs=1e-6)
+    # broadcast: one row of the drone matrix against all the points
+    row = geodesic_distance(lat[:1, None], lon[:1, None], lat, lon)
+    assert row.shape == (1, len(lat))
+    assert row[0, 0] == 0
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+import core.VRPWDData as VRPWDDataModule
+from core.VRPWDData import VRPWDData
+
+
+@pytest.fixture
+def cache_loads(monkeypatch):
+    """The list of the instance cache files loaded"""
+
+    loads = []
+    load_cache = VRPWDData._load_cache
+
+    def spy(self):
+        loads.append(self.cache_dir)
+        load_cache(self)
+
+    monkeypatch.setattr(VRPWDData, "_load_cache", spy)
+    return loads
+
+
+def cache_files(instance_dir) -> list:
+    return sorted(path.name for path in (instance_dir / ".cache").iterdir())
+
+
+def assert_same_instance(instance: VRPWDData, cached: VRPWDData):
+    assert cached.demands == instance.demands
+    assert cached.deposit == instance.deposit
+    assert cached.dpd_nodes == instance.dpd_nodes
+    assert np.array_equal(cached.dpd_time_matrix, instance.dpd_time_matrix)
+    assert np.array_equal(cached.dpd_predecessors, instance.dpd_predecessors)
+    contracted = instance.contracted_graph
+    assert cached.contracted_graph.chains == contracted.chains
+    assert np.array_equal(cached.contracted_graph.nodes, contracted.nodes)
+    assert np.array_equal(cached.contracted_graph.indptr, contracted.indptr)
+    assert np.array_equal(cached.contracted_graph.travel_time, contracted.travel_time)
+
+
+def test_cache_round_trip(instance_dir, cache_loads):
+    instance = VRPWDData(str(instance_dir), 1, False)
+    assert cache_loads == []
+    files = cache_files(instance_dir)
+    # the drone matrix is only built on first use
+    assert not any(name.startswith("drone_") for name in files)
+    drone_time_matrix = instance.drone_time_matrix
+    files = cache_files(instance_dir)
+    assert any(name.startswith("drone_") for name in files)
+    # written atomically: no temporary file left
+    assert not any(name.endswith(".tmp") for name in files)
+
+    cached = VRPWDData(str(instance_dir), 1, False)
+    assert len(cache_loads) == 1
+    assert_same_instance(instance, cached)
+    assert np.array_equal(cached.drone_nodes, instance.drone_nodes)
+    assert np.array_equal(cached.drone_time_matrix, drone_time_matrix)
+    assert cache_files(instance_dir) == files
+
+
+def test_stale_cache_version(instance_dir, cache_loads, monkeypatch):
+    instance = VRPWDData(str(instance_dir), 0, False)
+    files = cache_files(instance_dir)
+    monkeypatch.setattr(
+        VRPWDDataModule, "CACHE_VERSION", VRPWDDataModule.CACHE_VERSION + 1
+    )
+    rebuilt = VRPWDData(str(instance_dir), 0, False)
+    # the file of the other version is not read, a new one is written
+    assert cache_loads == []
+    assert_same_instance(instance, rebuilt)
+    assert len(cache_files(instance_dir)) == len(files) + 1
+    VRPWDData(str(instance_dir), 0, False)
+    assert len(cache_loads) == 1
+
+
+def test_no_cache(instance_dir, cache_loads):
+    VRPWDData(str(instance_dir), 1, False, use_cache=False).drone_time_matrix
+    assert cache_loads == []
+    assert not (instance_dir / ".cache").exists()
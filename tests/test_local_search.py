@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from algorithms.tsp.TSPLocalSearch import TSPLocalSearch, nearest_neighbors
+
+
+def random_matrix(n: int, seed: int = 0, symmetric: bool = False) -> np.ndarray:
+    """Return the travel time matrix of n random points, asymmetric unless
+    symmetric (one-way detours)"""
+
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 1000, (n, 2))
+    matrix = np.linalg.norm(points[:, None] - points[None], axis=2)
+    if not symmetric:
+        matrix += rng.uniform(0, 50, (n, n))
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+
+def tour_length(matrix: np.ndarray, tour: list) -> float:
+    return float(matrix[tour[:-1], tour[1:]].sum())
+
+
+def test_nearest_neighbors():
+    matrix = random_matrix(30)
+    neighbors = nearest_neighbors(matrix, 5)
+    round_trip = matrix + matrix.T
+    for node, nearest in enumerate(neighbors):
+        expected = [v for v in np.argsort(round_trip[node], kind="stable") if v != node]
+        assert nearest == expected[:5]
+
+
+def test_nearest_neighbors_ties_and_small_matrices():
+    # every round trip is 2: the ties are broken by node
+    matrix = np.ones((5, 5))
+    assert nearest_neighbors(matrix, 3) == [
+        [1, 2, 3],
+        [0, 2, 3],
+        [0, 1, 3],
+        [0, 1, 2],
+        [0, 1, 2],
+    ]
+    assert nearest_neighbors(matrix, 10) == [
+        [v for v in range(5) if v != node] for node in range(5)
+    ]
+    assert nearest_neighbors(np.zeros((1, 1)), 8) == [[]]
+
+
+@pytest.mark.parametrize("symmetric", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_improve(seed: int, symmetric: bool):
+    matrix = random_matrix(60, seed, symmetric)
+    tour = [0] + np.random.default_rng(seed).permutation(np.arange(1, 60)).tolist()
+    tour.append(0)
+    improved = TSPLocalSearch(matrix, time_limit=10).improve(tour)
+    assert improved[0] == improved[-1] == 0
+    assert sorted(improved[1:-1]) == list(range(1, 60))
+    assert tour_length(matrix, improved) < tour_length(matrix, tour)
+
+
+def test_improve_keeps_the_endpoints_of_a_path():
+    matrix = random_matrix(40)
+    tour = list(range(40))
+    improved = TSPLocalSearch(matrix, time_limit=10).improve(tour)
+    assert improved[0] == 0 and improved[-1] == 39
+    assert sorted(improved) == tour
+    assert tour_length(matrix, improved) <= tour_length(matrix, tour)
+    # a local optimum is not changed
+    assert TSPLocalSearch(matrix, time_limit=10).improve(improved) == improved
+
+
+def test_short_tours_are_unchanged():
+    matrix = random_matrix(3)
+    assert TSPLocalSearch(matrix).improve([0, 2, 1]) == [0, 2, 1]
+
+
+def test_time_limit():
+    matrix = random_matrix(1500)
+    tour = list(range(1500)) + [0]
+    # the setup (neighbor lists) is part of the budget
+    local_search = TSPLocalSearch(matrix, time_limit=0)
+    assert local_search.setup_time > 0
+    assert local_search.improve(tour) == tour
+    # only the first improvement pays for the setup
+    assert local_search.setup_time == 0
@@ -0,0 +1,72 @@
+from gurobipy import GRB
+
+from core.MIPProgress import MIPProgress
+
+INF = GRB.INFINITY
+
+
+class CallbackModel:
+    """The values given by cbGet in a callback of a Gurobi model"""
+
+    def __init__(self, **values):
+        self.values = {
+            getattr(GRB.Callback, name): value for name, value in values.items()
+        }
+
+    def cbGet(self, what):
+        return self.values[what]
+
+
+class SolvedModel:
+    def __init__(self, objective: float, bound: float, runtime: float):
+        self.SolCount, self.ObjVal, self.ObjBound = 1, objective, bound
+        self.Runtime = runtime
+
+
+def mipsol(runtime: float, objective: float, best: float = INF, bound: float = 0):
+    return CallbackModel(
+        RUNTIME=runtime, MIPSOL_OBJ=objective, MIPSOL_OBJBST=best, MIPSOL_OBJBND=bound
+    )
+
+
+def mip(runtime: float, best: float, bound: float = 0):
+    return CallbackModel(RUNTIME=runtime, MIP_OBJBST=best, MIP_OBJBND=bound)
+
+
+def test_first_incumbent_is_timed_when_found():
+    progress = MIPProgress()
+    progress.record(mip(0.5, INF), GRB.Callback.MIP)
+    progress.record(mipsol(1.0, 100), GRB.Callback.MIPSOL)
+    assert progress.first_incumbent_time is None
+    # shown as the incumbent by the next poll
+    progress.record(mip(3.0, 100), GRB.Callback.MIP)
+    assert progress.first_incumbent_time == 1.0
+
+
+def test_rejected_solutions_are_skipped():
+    progress = MIPProgress()
+    # a subtour rejected by a lazy constraint, then a tour
+    progress.record(mipsol(1.0, 80), GRB.Callback.MIPSOL)
+    progress.record(mipsol(2.0, 100), GRB.Callback.MIPSOL)
+    progress.record(mipsol(4.0, 90, best=100, bound=50), GRB.Callback.MIPSOL)
+    assert progress.first_incumbent_time == 2.0
+    assert progress.target_gap_time is None
+
+
+def test_start_solution():
+    # an incumbent never seen in MIPSOL is timed at its first poll
+    progress = MIPProgress()
+    progress.record(mip(0.2, 100, 99.5), GRB.Callback.MIP)
+    assert progress.first_incumbent_time == 0.2
+    assert progress.target_gap_time == 0.2
+
+
+def test_finish():
+    progress = MIPProgress()
+    progress.record(mipsol(1.0, 100), GRB.Callback.MIPSOL)
+    progress.finish(SolvedModel(100, 100, 1.5))
+    assert progress.first_incumbent_time == 1.0
+    assert progress.target_gap_time == 1.5
+    progress = MIPProgress()
+    progress.finish(SolvedModel(100, 100, 0.1))
+    assert progress.first_incumbent_time == 0.1
@@ -0,0 +1,28 @@
+import contextlib
+import io
+
+import psutil
+
+from algorithms.tsp.TSPMultiStart import TSPMultiStart
+from core.VRPWDData import VRPWDData
+
+
+def load(instance_dir) -> VRPWDData:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return VRPWDData(str(instance_dir), 0, False)
+
+
+def test_unknown_number_of_cores(instance_dir, monkeypatch):
+    monkeypatch.setattr(psutil, "cpu_count", lambda logical=True: None)
+    solver = TSPMultiStart(load(instance_dir))
+    assert solver.workers >= 1
+    assert solver.starts == 8 * solver.workers
+
+
+def test_solve(instance_dir):
+    instance = load(instance_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution = TSPMultiStart(instance, workers=2, starts=4, time_limit=5).solve()
+    truck = solution.routes["truck"]
+    assert truck["src"][0] == truck["dst"][-1] == instance.deposit
+    assert solution.check()
@@ -0,0 +1,56 @@
+import contextlib
+import io
+
+import pytest
+
+from gurobipy import GRB
+from algorithms.vrp.VRPWDHeuristic_1 import VRPWDHeuristic_1
+from algorithms.vrp.VRPWDReducedMIPModel_1 import VRPWDReducedMIPModel_1
+from core.VRPWDData import VRPWDData
+
+
+@pytest.fixture
+def instance(instance_dir) -> VRPWDData:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return VRPWDData(str(instance_dir), 1, False)
+
+
+def test_set_warm_start(instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        warm_start = VRPWDHeuristic_1(instance).solve()
+    model = VRPWDReducedMIPModel_1(instance, warm_start)
+    model.model.update()
+    for variables in (model.x, model.y1, model.y2, model.T):
+        assert all(var.Start != GRB.UNDEFINED for var in variables.values())
+    # a tour from the deposit through the nodes served by the truck
+    arcs = [arc for arc, var in model.x.items() if var.Start > 0.5]
+    assert sum(i == 0 for i, _ in arcs) == 1
+    assert sorted(i for i, _ in arcs) == sorted(j for _, j in arcs)
+    # the drone trips of the warm start launched from dpd nodes (the only launch
+    # nodes of the model)
+    dpd_nodes = set(instance.dpd_nodes)
+    trips = sum(var.Start for y in (model.y1, model.y2) for var in y.values())
+    assert trips == sum(
+        src in dpd_nodes and dest in dpd_nodes
+        for _, src, dest in warm_start.drone_trips()
+    )
+    # every demand is served once
+    served = {j for _, j in arcs}
+    for j in model.nodes:
+        drones = sum(
+            y[i, j].Start
+            for y in (model.y1, model.y2)
+            for i in model.nodes
+            if (i, j) in y
+        )
+        assert model.demand[j] * (j in served) + drones == model.demand[j]
+
+
+def test_warm_start_is_an_incumbent(instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        warm_start = VRPWDHeuristic_1(instance).solve()
+        model = VRPWDReducedMIPModel_1(instance)
+        model.model.Params.SolutionLimit = 1
+        model.solve(nb_threads=1, warm_start=warm_start)
+    assert model.model.SolCount >= 1
+    assert model.progress.first_incumbent_time is not None
@@ -0,0 +1,66 @@
+import numpy as np
+
+from core.Route import (
+    DELIVERY,
+    LOAD,
+    MOVE,
+    WAIT,
+    Route,
+    routes_from_solution,
+    solution_from_routes,
+)
+
+SOLUTION = {
+    "truck": [
+        (1, 1, 30, "d1"),
+        (1, 2, 12.5),
+        (2, 2, 60, 3),
+        (2, 2, 4.25),
+        (2, 2, 30, "d2"),
+        (2, 1, 12.5),
+    ],
+    "drone_1": [(1, 5, 40.0), (5, 1, 40.0)],
+    "drone_2": [(2, 6, 10.5), (6, 1, 20.0)],
+}
+
+
+def test_events():
+    route = Route.from_moves(SOLUTION["truck"])
+    assert len(route) == 6
+    assert route["kind"].tolist() == [LOAD, MOVE, DELIVERY, WAIT, LOAD, MOVE]
+    assert route["payload"].tolist() == [1, 0, 3, 0, 2, 0]
+    assert route["src"].tolist() == [1, 1, 2, 2, 2, 2]
+    assert route["dst"].tolist() == [1, 2, 2, 2, 2, 1]
+    assert route.total_duration() == 149.25
+    assert route.nbytes == route.events.nbytes
+
+
+def test_moves_round_trip():
+    for moves in SOLUTION.values():
+        assert Route.from_moves(moves).to_moves() == moves
+
+
+def test_empty_route():
+    route = Route.from_moves([])
+    assert len(route) == 0
+    assert route.to_moves() == []
+    assert route.total_duration() == 0.0
+
+
+def test_solution_round_trip():
+    routes = routes_from_solution(SOLUTION)
+    assert routes.keys() == SOLUTION.keys()
+    assert solution_from_routes(routes) == SOLUTION
+
+
+def test_route_is_compact():
+    moves = [(i, i + 1, 1.0) for i in range(1, 1001)]
+    route = Route.from_moves(moves)
+    # 4 + 4 + 8 + 4 bytes of nodes, duration and payload, 1 byte of kind per event
+    assert route.nbytes == 21 * len(moves)
+    assert np.array_equal(route["src"], np.arange(1, 1001))
+
+
+def test_integral_durations_are_integers():
+    moves = Route.from_moves(SOLUTION["truck"]).to_moves()
+    assert [type(move[2]) for move in moves] == [int, float, int, float, int, float]
@@ -0,0 +1,63 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from algorithms.vrp.VRPWDHeuristic_1 import VRPWDHeuristic_1
+from core.VRPWDData import VRPWDData
+from core.VRPWDSolution import VRPWDSolution
+
+
+@pytest.fixture
+def solution(instance_dir, tmp_path, monkeypatch) -> VRPWDSolution:
+    """A solution with drones of the instance 1, saved under tmp_path"""
+
+    monkeypatch.setattr(VRPWDSolution, "_VRPWDSolution__BASE_DIR", tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        instance = VRPWDData(str(instance_dir), 1, False)
+        return VRPWDHeuristic_1(instance).solve()
+
+
+def save_and_load(solution: VRPWDSolution, instance: VRPWDData = None):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        path = solution.save()
+        loaded = VRPWDSolution.load(instance or solution.instance, path)
+    return loaded, output.getvalue()
+
+
+@pytest.mark.parametrize("gap", ["unknown", 0.25])
+def test_save_and_load(solution, tmp_path, gap):
+    solution.gap = gap
+    solution.runtime = 1.5
+    loaded, output = save_and_load(solution)
+    assert "WARNING" not in output
+    assert loaded.algorithm == solution.algorithm
+    assert loaded.objective_value == solution.objective_value
+    assert loaded.runtime == 1.5
+    assert loaded.gap == gap
+    assert loaded.routes.keys() == solution.routes.keys()
+    for vehicle, route in solution.routes.items():
+        assert np.array_equal(loaded.routes[vehicle].events, route.events)
+    assert loaded.drone_trips() == solution.drone_trips()
+    assert loaded.check()
+
+
+def test_load_on_another_instance(solution, instance_dir):
+    demands = instance_dir / "demands.json"
+    demands.write_text(demands.read_text().replace('"amount": 1', '"amount": 2', 1))
+    with contextlib.redirect_stdout(io.StringIO()):
+        changed = VRPWDData(str(instance_dir), 1, False)
+    loaded, output = save_and_load(solution, changed)
+    assert "WARNING" in output
+    assert loaded.truck_stops() == solution.truck_stops()
+
+
+def test_solution_dict_view(solution):
+    moves = solution.solution
+    # built once from the routes
+    assert solution.solution is moves
+    assert moves.keys() == solution.routes.keys()
+    for vehicle, route in solution.routes.items():
+        assert moves[vehicle] == route.to_moves()
+    assert all(type(move[2]) is int for move in moves["truck"] if len(move) == 4)
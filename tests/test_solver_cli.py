@@ -0,0 +1,15 @@
+import sys
+
+import vrpwdSolver
+from core.VRPWDSolution import VRPWDSolution
+
+
+def test_any_number_of_flags(instance_dir, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(VRPWDSolution, "_VRPWDSolution__BASE_DIR", tmp_path)
+    # repeated flags: more arguments than the flags the solver knows
+    argv = ["vrpwdSolver.py", str(instance_dir), "0", "h"] + ["--no-cache"] * 16
+    monkeypatch.setattr(sys, "argv", argv)
+    vrpwdSolver.main()
+    assert "Result: " in capsys.readouterr().out
+    assert tmp_path.joinpath("solution", "instance_1", "case_0").is_dir()
+    assert not instance_dir.joinpath(".cache").exists()
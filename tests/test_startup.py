@@ -0,0 +1,18 @@
+import startupCheck
+
+# maximum median time of 'vrpwdSolver.py --help' (seconds)
+STARTUP_BUDGET = 0.5
+
+
+def test_help_startup_time():
+    assert startupCheck.measure_startup(repeats=5) <= STARTUP_BUDGET
+
+
+def test_light_method_imports_no_heavy_module():
+    assert startupCheck.imported_heavy_modules() == []
+
+
+def test_heavy_module_import_is_detected(monkeypatch):
+    # the mip method imports gurobipy, the check must see it
+    monkeypatch.setattr(startupCheck, "LIGHT_METHOD", (0, "mip"))
+    assert "gurobipy" in startupCheck.imported_heavy_modules()
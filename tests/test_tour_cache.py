@@ -0,0 +1,114 @@
+import contextlib
+import io
+
+import pytest
+
+from algorithms.tsp.TSPTourCache import EXTERNAL, TSPTourCache
+from core.Route import DELIVERY
+from core.VRPWDData import VRPWDData
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    TSPTourCache.clear()
+    yield
+    TSPTourCache.clear()
+    TSPTourCache.enabled = True
+
+
+def load(instance_dir, use_cache: bool = True) -> VRPWDData:
+    return VRPWDData(str(instance_dir), 0, False, use_cache=use_cache)
+
+
+def solve(instance: VRPWDData, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TSPTourCache.solve(instance, nb_threads=1, **kwargs)
+
+
+def tour_files(instance_dir) -> list:
+    return list((instance_dir / ".cache").glob("tsp_*.npz"))
+
+
+def a_tour(instance: VRPWDData) -> list:
+    return list(range(len(instance.dpd_nodes))) + [0]
+
+
+def test_put_and_get(instance_dir):
+    instance = load(instance_dir)
+    tour = a_tour(instance)
+    TSPTourCache.put(instance, tour, 0.25, "feasible", 12.5)
+    assert len(tour_files(instance_dir)) == 1
+    # read back from its file by another process
+    TSPTourCache.clear()
+    entry = TSPTourCache.get(instance)
+    assert entry == {"tour": tour, "gap": 0.25, "status": "feasible", "runtime": 12.5}
+
+
+def test_solved_tour_is_reused(instance_dir):
+    instance = load(instance_dir)
+    solution = solve(instance)
+    entry = TSPTourCache.get(instance)
+    assert entry["status"] == "optimal"
+    assert entry["gap"] <= 1e-5
+    assert entry["runtime"] == solution.runtime
+    cached = solve(instance)
+    # the runtime of a cached tour is the one of its solve, not of the lookup
+    assert cached.runtime == solution.runtime
+    assert cached.objective_value == solution.objective_value
+    assert cached.solution == solution.solution
+
+
+def test_tour_over_the_gap_is_solved_again(instance_dir):
+    instance = load(instance_dir)
+    TSPTourCache.put(instance, a_tour(instance), 0.5, "feasible", 12.5)
+    solution = solve(instance, max_gap=0.01)
+    assert solution.runtime != 12.5
+    assert TSPTourCache.get(instance)["gap"] <= 0.01
+    # good enough for a looser gap
+    TSPTourCache.put(instance, a_tour(instance), 0.5, "feasible", 12.5)
+    assert solve(instance, max_gap=0.6).runtime == 12.5
+
+
+def test_invalidated_by_the_instance_content(instance_dir):
+    instance = load(instance_dir)
+    solve(instance)
+    assert len(tour_files(instance_dir)) == 1
+    demands = instance_dir / "demands.json"
+    demands.write_text(demands.read_text().replace('"amount": 1', '"amount": 2', 1))
+    changed = load(instance_dir)
+    assert changed.instance_hash != instance.instance_hash
+    assert TSPTourCache.get(changed) is None
+    TSPTourCache.clear()
+    assert TSPTourCache.get(changed) is None
+
+
+def test_inject_overrides_a_solved_tour(instance_dir):
+    instance = load(instance_dir)
+    solve(instance)
+    stops = instance.dpd_nodes[:0:-1]
+    TSPTourCache.inject(instance, stops)
+    entry = TSPTourCache.get(instance)
+    assert entry["status"] == EXTERNAL
+    assert entry["tour"] == [0] + list(range(len(stops), 0, -1)) + [0]
+    solution = solve(instance)
+    assert solution.runtime == 0.0
+    assert solution.gap == "unknown"
+    truck = solution.routes["truck"]
+    assert truck["src"][truck["kind"] == DELIVERY].tolist() == [
+        node for node in stops if instance.demands.get(node, 0) > 0
+    ]
+
+
+def test_no_file_without_cache(instance_dir):
+    instance = load(instance_dir, use_cache=False)
+    solve(instance)
+    assert TSPTourCache.get(instance) is not None
+    assert not (instance_dir / ".cache").exists()
+
+
+def test_disabled(instance_dir):
+    TSPTourCache.enabled = False
+    instance = load(instance_dir)
+    solve(instance)
+    assert TSPTourCache.get(instance) is None
+    assert tour_files(instance_dir) == []
@@ -0,0 +1,18 @@
+from core.Tracer import Tracer
+
+
+def test_stage_memory_peaks():
+    tracer = Tracer()
+    tracer.enable(memory=True)
+    with tracer.span("large"):
+        data = bytearray(20 * 1024 * 1024)
+        del data
+    # the peak of the previous stage is not counted again
+    with tracer.span("small"):
+        data = bytearray(1024 * 1024)
+        del data
+    report = tracer.memory_report()
+    tracer.disable()
+    peaks = {stage["name"]: stage["peak_mb"] for stage in report["stages"]}
+    assert peaks["large"] >= 20
+    assert 1 <= peaks["small"] < 5
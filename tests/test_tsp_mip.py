@@ -0,0 +1,106 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+from itertools import permutations
+from algorithms.tsp.TSPMIPModel import TSPMIPModel
+from core.VRPWDData import VRPWDData
+
+# two clusters of demands (the first one around the deposit) joined by a long road:
+# the optimal solution of the degree constraints alone is a subtour in each cluster
+NODES = {
+    "deposit": (44.8500102, 0.5370699),
+    "a1": (44.8510, 0.5370),
+    "a2": (44.8505, 0.5380),
+    "a3": (44.8495, 0.5380),
+    "b1": (44.8500, 0.6000),
+    "b2": (44.8510, 0.6010),
+    "b3": (44.8490, 0.6010),
+}
+ROADS = [
+    ("deposit", "a1", 110),
+    ("deposit", "a3", 100),
+    ("a1", "a2", 100),
+    ("a2", "a3", 110),
+    ("a1", "a3", 150),
+    ("a2", "b1", 5000),
+    ("b1", "b2", 130),
+    ("b2", "b3", 160),
+    ("b3", "b1", 130),
+]
+
+
+@pytest.fixture
+def instance(tmp_path) -> VRPWDData:
+    roads = [
+        {
+            "id": k,
+            "lat_min": NODES[src][0],
+            "lon_min": NODES[src][1],
+            "lat_max": NODES[dest][0],
+            "lon_max": NODES[dest][1],
+            "length": length,
+            "oneway": 0,
+            "osmid": k,
+            "type": "secondary",
+        }
+        for k, (src, dest, length) in enumerate(ROADS)
+    ]
+    demands = [
+        {"lat": lat, "lon": lon, "amount": 1}
+        for name, (lat, lon) in NODES.items()
+        if name != "deposit"
+    ]
+    tmp_path.joinpath("map.json").write_text(json.dumps(roads))
+    tmp_path.joinpath("demands.json").write_text(json.dumps(demands))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return VRPWDData(str(tmp_path), 0, False, use_cache=False)
+
+
+def relaxation_values(model: TSPMIPModel) -> dict:
+    """Return the values of the edges in the optimal solution of the LP relaxation
+    of the degree constraints"""
+
+    model.model.update()
+    relaxed = model.model.relax()
+    relaxed.Params.OutputFlag = 0
+    relaxed.optimize()
+    return dict(zip(model.time.keys(), (var.X for var in relaxed.getVars())))
+
+
+def test_relaxation_has_subtours(instance):
+    model = TSPMIPModel(instance)
+    vals = relaxation_values(model)
+    components = model._components(vals, 1e-6)
+    assert len(components) == 2
+    deposit_side, other_side = sorted(components, key=lambda c: 0 not in c)
+    # joined by two half edges, the subtours are one component whose global min
+    # cut (of 1 < 2) separates them
+    for i, j in zip(deposit_side[:2], other_side[:2]):
+        vals[min(i, j), max(i, j)] = 0.5
+    assert len(model._components(vals, 1e-6)) == 1
+    assert sorted(model._min_cut(vals)) == sorted(deposit_side)
+
+
+def test_single_tour(instance):
+    model = TSPMIPModel(instance)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution = model.solve(nb_threads=1)
+    tour = model.tour
+    assert tour[0] == tour[-1] == 0
+    assert sorted(tour[:-1]) == sorted(model.nodes)
+    matrix = instance.dpd_time_matrix
+    length = sum(matrix[i][j] for i, j in zip(tour[:-1], tour[1:]))
+    best = min(
+        sum(matrix[i][j] for i, j in zip((0,) + other, other + (0,)))
+        for other in permutations(model.nodes[1:])
+    )
+    assert length == pytest.approx(best)
+    assert solution.check()
+    # no subtour cut is violated by a tour
+    edges = {(min(i, j), max(i, j)) for i, j in zip(tour[:-1], tour[1:])}
+    vals = {edge: float(edge in edges) for edge in model.time}
+    assert len(model._components(vals, 0.5)) == 1
+    assert model._min_cut(vals) is None
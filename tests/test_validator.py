@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from core.CSRGraph import CSRGraph
+from core.Route import routes_from_solution
+from core.VRPWDValidator import VRPWDValidator
+
+# the drone flies any leg in at least this time
+DRONE_TIME = 50.0
+
+
+class TinyInstance:
+    """Instance of the roads 1-2-3 (deposit 1), the truck delivering node 3 and the
+    drone 1 delivering the nodes 4 and 5 from the deposit"""
+
+    deposit = 1
+    demands = {3: 1, 4: 1, 5: 1}
+    csr_graph = CSRGraph.from_edges(
+        [1, 2, 1, 1], [2, 3, 4, 5], [100.0, 100.0, 500.0, 500.0], np.zeros((5, 2))
+    )
+
+    def __init__(self, case: int = 1):
+        self._CASE = case
+
+    def drone_times(self, src, dest):
+        return np.full(len(src), DRONE_TIME)
+
+
+def solution(wait: bool = True) -> dict:
+    """Return a solution whose drone is reloaded at the deposit after its first
+    trip, the truck waiting for its recovery there if wait"""
+
+    truck = [(1, 1, 30, "d1"), (1, 2, 100), (2, 1, 100)]
+    if wait:
+        # back at 230, the drone arrives at 330
+        truck.append((1, 1, 100))
+    truck += [
+        (1, 1, 30, "d1"),
+        (1, 2, 100),
+        (2, 3, 100),
+        (3, 3, 60, 1),
+        (3, 2, 100),
+        (2, 1, 100),
+    ]
+    drone = [(1, 4, 150), (4, 1, 150), (1, 5, 100), (5, 1, 100)]
+    return {"truck": truck, "drone_1": drone}
+
+
+def validate(solution: dict, case: int = 1) -> list:
+    return VRPWDValidator(TinyInstance(case)).validate(routes_from_solution(solution))
+
+
+def test_valid_solution():
+    assert validate(solution()) == []
+
+
+def test_reload_before_recovery():
+    violations = validate(solution(wait=False))
+    assert len(violations) == 1
+    assert violations[0].startswith("recovery: drone 1 trip 0")
+
+
+def test_quantities():
+    moves = solution()
+    moves["truck"].remove((3, 3, 60, 1))
+    moves["drone_1"][0] = (1, 2, 150)
+    moves["drone_1"][1] = (2, 1, 150)
+    violations = validate(moves)
+    assert "quantity: node 3 receives 0 of its 1 packages" in violations
+    assert "quantity: node 4 receives 0 of its 1 packages" in violations
+    assert "quantity: 1 packages delivered to node 2 without demand" in violations
+
+
+def test_truck_continuity_and_times():
+    moves = solution()
+    # a shortcut without road and a move faster than its road
+    moves["truck"][1:3] = [(1, 3, 100), (3, 1, 100)]
+    moves["truck"][-1] = (2, 1, 10)
+    violations = validate(moves)
+    assert any(v.startswith("continuity: move 1 from 1 to 3") for v in violations)
+    assert any(v.startswith("time: move 9 from 2 to 1") for v in violations)
+
+
+@pytest.mark.parametrize("drone", [2, 3])
+def test_every_drone_is_replayed(drone: int):
+    moves = solution()
+    moves[f"drone_{drone}"] = [(1, 4, 10), (4, 1, 10)]
+    assert validate(moves) == [f"drone: drone {drone} has 1 trips for 0 launches"]
+
+
+def test_no_drone_in_case_0():
+    violations = validate(solution(), case=0)
+    assert "drone: drone 1 is used in case 0" in violations